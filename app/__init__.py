@@ -1,47 +1,98 @@
+from flask import Flask
+from flask_cors import CORS
+from sqlalchemy import inspect
 from app.services.server import FlaskServer
 from app.services import db, db_sql, Database
 from app.utils import logger
-from flask_cors import CORS
-from sqlalchemy import inspect
-from flask import current_app
-import app.models
-from app.routes import stage, bp, survey, answers, scale_options, client, event, product, consultant
-
-# Initialize the FlaskServer instance
-server = FlaskServer(
-    name="magnethics",
-    db_sql=db,
-    db_mongo=None,
-    env="development"
-)
-
-server.add_blueprint(bp, url_prefix="/employee")
-server.add_blueprint(stage, url_prefix="/stage")
-server.add_blueprint(survey, url_prefix="/survey")
-server.add_blueprint(answers, url_prefix="/answer")
-server.add_blueprint(scale_options, url_prefix="/scale-options")
-server.add_blueprint(client, url_prefix="/client")
-server.add_blueprint(event, url_prefix="/event")
-server.add_blueprint(product, url_prefix="/product")
-server.add_blueprint(consultant, url_prefix="/consultant")
-
-# Create the Flask app
-app = server.create_app()
-CORS(app)
-
-# Initialize MongoDB connection
-mongo_db = None
-try:
-    db_sql.test_connection(app)
-    with app.app_context():
-        mongo_db = Database(url=app.config["MONGO_URI"], databaseName="Magnethics")
-        mongo_db.connect()
-        # Attach `mongo_db` to the Flask app context
-        current_app.mongo_db = mongo_db
-        db.create_all()
-        inspector = inspect(db.engine)
-        tables = inspector.get_table_names()
-        logger.info(f"Tables in the database: {tables}")
-except Exception as e:
-    logger.error("Failed to initialize database. Check your configuration.")
-    raise e
\ No newline at end of file
+
+
+def _connect_mongo(flask_app):
+    """
+    Opens this process's MongoDB connection and attaches it to the app as `mongo_db`.
+    """
+    mongo_db = Database(url=flask_app.config["MONGO_URI"], databaseName="Magnethics")
+    mongo_db.connect()
+    flask_app.mongo_db = mongo_db
+    return mongo_db
+
+
+def create_worker_app() -> Flask:
+    """
+    Minimal application for pool processes (see app.services.job_service): configuration,
+    SQLAlchemy and a dedicated MongoDB connection, without the blueprints, the Clerk client
+    or the startup work of create_app(), which the web process has already done.
+    """
+    flask_app = FlaskServer(name="magnethics", db_sql=db, db_mongo=None, env="development").create_app()
+    _connect_mongo(flask_app)
+    return flask_app
+
+
+def create_app() -> Flask:
+    """
+    Builds the web application: registers the blueprints, connects MySQL and MongoDB
+    and runs the startup work (tables, indexes, orphaned jobs).
+
+    :raises Exception: If the databases cannot be initialized.
+    """
+    from app.models import SurveyAnswers, SurveyResults, Job, EmployeeSurveyAssignment
+    from app.services.job_service import JobService
+    from app.routes import stage, bp, survey, answers, scale_options, client, event, product, consultant, job
+
+    # Initialize the FlaskServer instance
+    server = FlaskServer(
+        name="magnethics",
+        db_sql=db,
+        db_mongo=None,
+        env="development"
+    )
+
+    server.add_blueprint(bp, url_prefix="/employee")
+    server.add_blueprint(stage, url_prefix="/stage")
+    server.add_blueprint(survey, url_prefix="/survey")
+    server.add_blueprint(answers, url_prefix="/answer")
+    server.add_blueprint(scale_options, url_prefix="/scale-options")
+    server.add_blueprint(client, url_prefix="/client")
+    server.add_blueprint(event, url_prefix="/event")
+    server.add_blueprint(product, url_prefix="/product")
+    server.add_blueprint(consultant, url_prefix="/consultant")
+    server.add_blueprint(job, url_prefix="/job")
+
+    # Create the Flask app
+    flask_app = server.create_app()
+    CORS(flask_app)
+
+    # Initialize MongoDB connection
+    try:
+        db_sql.test_connection(flask_app)
+        with flask_app.app_context():
+            mongo_db = _connect_mongo(flask_app)
+            SurveyAnswers(mongo_db.get_collection("SurveyAnswers")).ensure_indexes()
+            SurveyResults(mongo_db.get_collection("SurveyResults")).ensure_indexes()
+            Job(mongo_db.get_collection("Jobs")).ensure_indexes()
+            JobService(mongo_db, flask_app.config).reclaim_orphaned()
+            db.create_all()
+            EmployeeSurveyAssignment.ensure_indexes()
+            inspector = inspect(db.engine)
+            tables = inspector.get_table_names()
+            logger.info(f"Tables in the database: {tables}")
+    except Exception as e:
+        logger.error("Failed to initialize database. Check your configuration.")
+        raise e
+    return flask_app
+
+
+_app = None
+
+
+def __getattr__(name):
+    """
+    Creates the application on first access to `app` (main.py, gunicorn app:app,
+    flask run), so importing a module of this package (tests, pool processes)
+    does not connect to the databases.
+    """
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from clerk_backend_api import Clerk
 from app.utils import logger
@@ -24,6 +25,19 @@ class BaseConfig:
     WEBSITE_DOMAIN = os.getenv("WEBSITE_DOMAIN")
     CLERK_PEM_PUBLIC_KEY = format_pem_key(os.getenv("CLERK_PEM_PUBLIC_KEY", ""))
     CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+    # Bulk employee upload: Clerk Backend API quota and concurrent requests
+    CLERK_RATE_LIMIT_PER_SECOND = float(os.getenv("CLERK_RATE_LIMIT_PER_SECOND", "10"))
+    CLERK_PROVISIONING_WORKERS = int(os.getenv("CLERK_PROVISIONING_WORKERS", "4"))
+    # Background jobs (heavy exports and assignment generation)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_ARTIFACT_DIR = os.getenv("JOB_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "magnethics_jobs"))
+    JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(24 * 60 * 60)))
+    JOB_ARTIFACT_MAX_BYTES = int(os.getenv("JOB_ARTIFACT_MAX_BYTES", str(2 * 1024 ** 3)))
+    JOB_PURGE_INTERVAL_SECONDS = int(os.getenv("JOB_PURGE_INTERVAL_SECONDS", "600"))
+    # Queued or running jobs older than this are considered lost and marked failed
+    JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", str(60 * 60)))
+    # Core budget of multi-tenant suggestion batches (defaults to every core)
+    SUGGESTION_BATCH_CORES = int(os.getenv("SUGGESTION_BATCH_CORES", str(os.cpu_count() or 1)))
 
 class DevelopmentConfig(BaseConfig):
     FLASK_ENV = "development"
@@ -92,6 +106,19 @@ def get_clerk_client()-> Clerk:
         logger.error(f"Error creating Clerk client: {e}")
 
 
-# Global instance of the Clerk client
-CLERK_CLIENT = get_clerk_client()
+# Global instance of the Clerk client, created on first use
+_clerk_client = None
+
+
+def __getattr__(name):
+    """
+    Creates CLERK_CLIENT on first access (`from app.config import CLERK_CLIENT`), so
+    processes that never load the routes, such as job workers, do not build one.
+    """
+    global _clerk_client
+    if name != "CLERK_CLIENT":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _clerk_client is None:
+        _clerk_client = get_clerk_client()
+    return _clerk_client
 
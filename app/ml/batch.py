@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.ml.suggestion_engine import SuggestionEngine
+from app.models import Employee
+from app.utils import logger
+
+# SQL engine of the current pool process (see _init_worker)
+_worker_sql = None
+
+
+def _init_worker(database_uri, engine_options):
+    """
+    Gives every pool process its own, unpooled SQL engine. Processes are spawned, so
+    nothing (connections, locks, monitor threads) is inherited from the caller, and only
+    this engine is opened: importing app.ml.batch does not create the Flask app.
+    """
+    global _worker_sql
+    _worker_sql = create_engine(database_uri, poolclass=NullPool, **engine_options)
+
+
+def _fetch_rows(tenant_id):
+    with _worker_sql.connect() as conn:
+        return Employee.load_columns(tenant_id, Employee.GRAPH_COLUMNS, session=conn)
+
+
+def _run_tenant(tenant_id, config, include_suggestions):
+    start = time.perf_counter()
+    rows = _fetch_rows(tenant_id)
+    fetched = time.perf_counter()
+    suggestions = SuggestionEngine(None, tenant_id, config, employees=rows).assign_suggestions() if rows else {}
+    finished = time.perf_counter()
+
+    result = {
+        "tenant_id": tenant_id,
+        "employees": len(rows),
+        "suggestions": sum(len(items) for items in suggestions.values()),
+        "fetch_seconds": round(fetched - start, 3),
+        "engine_seconds": round(finished - fetched, 3),
+        "seconds": round(finished - start, 3),
+    }
+    if include_suggestions:
+        result["suggestion_map"] = suggestions
+    return result
+
+
+def run_batch(tenant_ids, database_uri, engine_options=None, cores: int = None, config: dict = None,
+              include_suggestions: bool = False):
+    """
+    Runs SuggestionEngine for many tenants in a process pool.
+
+    The core budget is split between processes (one tenant each at a time) and the
+    Word2Vec threads of every process, so processes * workers never exceeds `cores`.
+    With the suggestion cache enabled (the default) this also warms the cache used by
+    AssignmentService.generate_assignment_excel.
+
+    :param database_uri: SQLAlchemy URI the pool processes connect to.
+    :param engine_options: Extra create_engine() options (e.g. SSL connect_args).
+    :param cores: Core budget (defaults to os.cpu_count()).
+    :param config: SuggestionEngine config overrides.
+    :param include_suggestions: Whether each result carries its full "suggestion_map".
+    :return: One result per tenant (in input order) with employees, suggestions,
+             fetch_seconds, engine_seconds and seconds, or an "error".
+    """
+    tenant_ids = list(dict.fromkeys(tenant_ids))
+    if not tenant_ids:
+        return []
+    cores = max(1, cores or os.cpu_count() or 1)
+    processes = min(len(tenant_ids), cores)
+    config = {**(config or {}), "workers": max(1, cores // processes)}
+
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(database_uri, engine_options or {})) as executor:
+        futures = {
+            executor.submit(_run_tenant, tenant_id, config, include_suggestions): tenant_id
+            for tenant_id in tenant_ids
+        }
+        for future in as_completed(futures):
+            tenant_id = futures[future]
+            try:
+                results[tenant_id] = future.result()
+                logger.info(
+                    f"Suggestions for tenant {tenant_id}: {results[tenant_id]['employees']} employees "
+                    f"in {results[tenant_id]['seconds']}s"
+                )
+            except Exception as e:
+                logger.error(f"Suggestion batch failed for tenant {tenant_id}: {e}")
+                results[tenant_id] = {"tenant_id": tenant_id, "error": str(e)}
+
+    logger.info(
+        f"Suggestion batch of {len(tenant_ids)} tenants finished in {time.perf_counter() - start:.1f}s "
+        f"({processes} processes x {config['workers']} threads)"
+    )
+    return [results[tenant_id] for tenant_id in tenant_ids]
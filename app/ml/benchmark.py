@@ -0,0 +1,228 @@
+"""
+Offline benchmark of the SuggestionEngine on synthetic org charts.
+
+Compares runtime and suggestion quality of the embedding backends without touching
+the database.
+
+    python -m app.ml.benchmark --employees 2000 --backends node2vec walks spectral
+    python -m app.ml.benchmark --employees 30000 --backends spectral --clustering knn_graph
+    python -m app.ml.benchmark --employees 5000 --backends walks --incremental 50
+    python -m app.ml.benchmark --employees 50000 --backends spectral --mode structural
+    python -m app.ml.benchmark --employees 2000 --backends walks node2vec --workers 4 --reproducible 42
+"""
+import argparse
+import copy
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.ml.suggestion_engine import SuggestionEngine
+
+
+def synthetic_org_chart(n_employees: int, span: int = 6, functional_ratio: float = 0.1, seed: int = 0):
+    """
+    Builds a random org chart: every employee reports to one of the employees of the
+    previous level (about `span` reports each) and a fraction also has a functional supervisor.
+
+    :return: List of objects with id, employee_number, direct_supervisor_id and functional_supervisor_id.
+    """
+    rng = np.random.default_rng(seed)
+    employees = []
+    for i in range(n_employees):
+        direct = None
+        functional = None
+        if i > 0:
+            center = (i - 1) // span
+            direct = int(rng.integers(max(0, center - 1), center + 1)) + 1
+            if rng.random() < functional_ratio:
+                functional = int(rng.integers(0, i)) + 1
+                if functional == direct:
+                    functional = None
+        employees.append(SimpleNamespace(
+            id=i + 1,
+            employee_number=f"E{i + 1:06d}",
+            direct_supervisor_id=direct,
+            functional_supervisor_id=functional,
+        ))
+    return employees
+
+
+def perturb_org_chart(employees, changes: int, seed: int = 1):
+    """
+    Returns a copy of `employees` with `changes` employees re-parented and `changes` new hires.
+    """
+    rng = np.random.default_rng(seed)
+    employees = [copy.copy(e) for e in employees]
+    n = len(employees)
+    for i in rng.choice(np.arange(1, n), size=min(changes, n - 1), replace=False):
+        employees[i].direct_supervisor_id = int(rng.integers(0, i)) + 1
+    for k in range(changes):
+        new_id = n + k + 1
+        employees.append(SimpleNamespace(
+            id=new_id,
+            employee_number=f"E{new_id:06d}",
+            direct_supervisor_id=int(rng.integers(0, n)) + 1,
+            functional_supervisor_id=None,
+        ))
+    return employees
+
+
+def in_memory_engine(employees, config: dict = None):
+    """
+    SuggestionEngine fed from a list of employees instead of the database.
+    """
+    return SuggestionEngine(None, "benchmark", config, employees=employees)
+
+
+def peer_precision(employees, suggestions):
+    """
+    Fraction of "Homólogo" suggestions that are structurally close to the employee
+    (same direct or functional supervisor, or one's supervisor is the other's).
+    """
+    by_number = {e.employee_number: e for e in employees}
+    hits = total = 0
+    for emp_num, items in suggestions.items():
+        e = by_number[emp_num]
+        mine = {e.direct_supervisor_id, e.functional_supervisor_id} - {None}
+        for item in items:
+            if item["relation"] != "Homólogo":
+                continue
+            p = by_number[item["employee_number"]]
+            theirs = {p.direct_supervisor_id, p.functional_supervisor_id} - {None}
+            total += 1
+            if mine & theirs or e.direct_supervisor_id in theirs or p.direct_supervisor_id in mine:
+                hits += 1
+    return hits / total if total else 0.0
+
+
+def overlap(baseline, suggestions):
+    """
+    Mean Jaccard overlap of every employee's suggested set against a baseline run.
+    """
+    scores = []
+    for emp_num, items in baseline.items():
+        a = {item["employee_number"] for item in items}
+        b = {item["employee_number"] for item in suggestions.get(emp_num, [])}
+        scores.append(len(a & b) / len(a | b) if a | b else 1.0)
+    return float(np.mean(scores)) if scores else 1.0
+
+
+def run(n_employees: int, backends, config: dict = None, seed: int = 0):
+    """
+    Runs the engine once per backend on the same synthetic org chart.
+
+    :return: List of dicts with backend, seconds, peer_precision and overlap
+             (against the first backend in `backends`).
+    """
+    employees = synthetic_org_chart(n_employees, seed=seed)
+    results = []
+    baseline = None
+    for backend in backends:
+        engine = in_memory_engine(employees, {**(config or {}), "embedding_backend": backend, "cache_dir": None})
+        start = time.perf_counter()
+        suggestions = engine.assign_suggestions()
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline = suggestions
+        results.append({
+            "backend": backend,
+            "seconds": seconds,
+            "peer_precision": peer_precision(employees, suggestions),
+            "overlap": overlap(baseline, suggestions),
+        })
+    return results
+
+
+def run_incremental(n_employees: int, changes: int, config: dict = None, seed: int = 0):
+    """
+    Compares an incremental update against a full retrain after a small org chart change.
+
+    :return: Dict with the seconds of both runs, their peer precision and their overlap.
+    """
+    config = {"embedding_backend": "walks", **(config or {})}
+    employees = synthetic_org_chart(n_employees, seed=seed)
+    changed = perturb_org_chart(employees, changes, seed=seed + 1)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cached_config = {**config, "cache_dir": cache_dir, "incremental_max_change": 1.0}
+        in_memory_engine(employees, cached_config).assign_suggestions()
+        start = time.perf_counter()
+        incremental = in_memory_engine(changed, cached_config).assign_suggestions()
+        incremental_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full = in_memory_engine(changed, {**config, "cache_dir": None}).assign_suggestions()
+    full_seconds = time.perf_counter() - start
+
+    return {
+        "full_seconds": full_seconds,
+        "incremental_seconds": incremental_seconds,
+        "full_peer_precision": peer_precision(changed, full),
+        "incremental_peer_precision": peer_precision(changed, incremental),
+        "overlap": overlap(full, incremental),
+    }
+
+
+def check_reproducible(n_employees: int, backends, random_state: int, config: dict = None, runs: int = 2,
+                       seed: int = 0):
+    """
+    Runs every backend `runs` times with the same random_state and checks that all
+    runs return identical suggestions.
+
+    :return: {backend: True if every run matched the first one}
+    """
+    employees = synthetic_org_chart(n_employees, seed=seed)
+    outcome = {}
+    for backend in backends:
+        run_config = {**(config or {}), "embedding_backend": backend, "cache_dir": None,
+                      "random_state": random_state}
+        first = in_memory_engine(employees, run_config).assign_suggestions()
+        outcome[backend] = all(
+            in_memory_engine(employees, run_config).assign_suggestions() == first
+            for _ in range(runs - 1)
+        )
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SuggestionEngine embedding backends")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--backends", nargs="+", default=["node2vec", "walks", "spectral"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--clustering", default="agglomerative")
+    parser.add_argument("--mode", default="embedding", choices=["embedding", "structural"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--incremental", type=int, default=0,
+                        help="Re-parent and add this many employees and compare incremental vs full retrain")
+    parser.add_argument("--reproducible", type=int, default=None, metavar="RANDOM_STATE",
+                        help="Check that seeded runs return identical suggestions")
+    args = parser.parse_args()
+    config = {"workers": args.workers, "clustering": args.clustering, "mode": args.mode}
+
+    if args.reproducible is not None:
+        outcome = check_reproducible(args.employees, args.backends, args.reproducible, config, seed=args.seed)
+        for backend, identical in outcome.items():
+            print(f"{backend:<12}{'identical' if identical else 'DIFFERENT'}")
+        if not all(outcome.values()):
+            raise SystemExit(1)
+        return
+
+    if args.incremental:
+        r = run_incremental(args.employees, args.incremental, {**config, "embedding_backend": args.backends[0]},
+                            seed=args.seed)
+        print(f"{'run':<14}{'seconds':>10}{'peer_prec':>12}")
+        print(f"{'full':<14}{r['full_seconds']:>10.2f}{r['full_peer_precision']:>12.3f}")
+        print(f"{'incremental':<14}{r['incremental_seconds']:>10.2f}{r['incremental_peer_precision']:>12.3f}")
+        print(f"overlap incremental vs full: {r['overlap']:.3f}")
+        return
+
+    results = run(args.employees, args.backends, config, seed=args.seed)
+    print(f"{'backend':<12}{'seconds':>10}{'peer_prec':>12}{'overlap':>10}")
+    for r in results:
+        print(f"{r['backend']:<12}{r['seconds']:>10.2f}{r['peer_precision']:>12.3f}{r['overlap']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+from gensim.models import Word2Vec
+
+from app.utils import logger
+
+# Config keys that do not change the engine's output
+NON_FINGERPRINT_KEYS = ("cache_dir", "cache_max_bytes", "workers", "incremental_max_change",
+                        "incremental_max_chain")
+
+
+class SuggestionCache:
+    """
+    Local disk cache of SuggestionEngine runs, keyed by tenant and org chart fingerprint.
+
+    Layout:
+        <root>/<sha1(tenant_id)>/<fingerprint>/
+            X.npy              embeddings, one row per employee (loaded memory-mapped)
+            labels.npy         cluster label of every employee
+            suggestions.json   [[employee_number, [{employee_number, relation}, ...]], ...]
+            graph.json         {"ids", "numbers", "direct", "functional"} in row order,
+                               plus the "config" fingerprint and the "lineage"
+                               ({"drift", "chain"}: change ratio accumulated and incremental
+                               updates chained since the last full retrain)
+            w2v.model          trained Word2Vec model (walk-based backends only)
+
+    Entries are evicted least recently used first (by directory mtime, refreshed on
+    every hit) whenever the cache grows beyond `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def graph_of(employees):
+        return {
+            "ids": [e.id for e in employees],
+            "numbers": [e.employee_number for e in employees],
+            "direct": [e.direct_supervisor_id for e in employees],
+            "functional": [e.functional_supervisor_id for e in employees],
+        }
+
+    @staticmethod
+    def _hash(payload):
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    @staticmethod
+    def config_fingerprint(config):
+        """
+        Hash of the engine config keys that affect its output.
+        """
+        return SuggestionCache._hash({k: v for k, v in config.items() if k not in NON_FINGERPRINT_KEYS})
+
+    @staticmethod
+    def fingerprint(graph, config):
+        """
+        Hash of the employees, their supervisor edges and the engine config.
+        """
+        return SuggestionCache._hash({"graph": graph, "config": SuggestionCache.config_fingerprint(config)})
+
+    def tenant_dir(self, tenant_id):
+        return os.path.join(self.root, hashlib.sha1(str(tenant_id).encode("utf-8")).hexdigest())
+
+    def _entry_dir(self, tenant_id, fingerprint):
+        return os.path.join(self.tenant_dir(tenant_id), fingerprint)
+
+    def _read(self, path):
+        with open(os.path.join(path, "suggestions.json"), encoding="utf-8") as f:
+            suggestions = {emp_num: items for emp_num, items in json.load(f)}
+        with open(os.path.join(path, "graph.json"), encoding="utf-8") as f:
+            graph = json.load(f)
+        return {
+            "X": np.load(os.path.join(path, "X.npy"), mmap_mode="r"),
+            "labels": np.load(os.path.join(path, "labels.npy")),
+            "suggestions": suggestions,
+            "graph": graph,
+            "path": path,
+        }
+
+    def load(self, tenant_id, fingerprint):
+        """
+        Returns the cached entry ({"X", "labels", "suggestions", "graph", "path"}) or None.
+        """
+        path = self._entry_dir(tenant_id, fingerprint)
+        if not os.path.isdir(path):
+            return None
+        try:
+            entry = self._read(path)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable suggestion cache entry {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def latest(self, tenant_id):
+        """
+        Returns the most recently used entry of a tenant, or None.
+        """
+        tenant_dir = self.tenant_dir(tenant_id)
+        if not os.path.isdir(tenant_dir):
+            return None
+        entries = [
+            os.path.join(tenant_dir, name) for name in os.listdir(tenant_dir)
+            if not name.startswith(".")
+        ]
+        for path in sorted(entries, key=os.path.getmtime, reverse=True):
+            entry = self.load(tenant_id, os.path.basename(path))
+            if entry is not None:
+                return entry
+        return None
+
+    @staticmethod
+    def load_model(entry):
+        """
+        Loads the Word2Vec model of an entry, or returns None when it has none.
+        """
+        path = os.path.join(entry["path"], "w2v.model")
+        if not os.path.exists(path):
+            return None
+        return Word2Vec.load(path)
+
+    def store(self, tenant_id, fingerprint, X, labels, suggestions, graph, config, model=None, lineage=None):
+        """
+        Writes an entry atomically (into a temporary directory that is then renamed)
+        and evicts old entries beyond the size budget.
+
+        :param lineage: {"drift", "chain"} since the last full retrain (None for unknown,
+                        which makes the next change retrain fully).
+        """
+        tenant_dir = self.tenant_dir(tenant_id)
+        os.makedirs(tenant_dir, exist_ok=True)
+        tmp = os.path.join(tenant_dir, f".{fingerprint}.{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        try:
+            np.save(os.path.join(tmp, "X.npy"), np.asarray(X))
+            np.save(os.path.join(tmp, "labels.npy"), np.asarray(labels))
+            with open(os.path.join(tmp, "suggestions.json"), "w", encoding="utf-8") as f:
+                json.dump([[emp_num, items] for emp_num, items in suggestions.items()], f)
+            with open(os.path.join(tmp, "graph.json"), "w", encoding="utf-8") as f:
+                json.dump({**graph, "config": self.config_fingerprint(config), "lineage": lineage}, f)
+            if model is not None:
+                model.save(os.path.join(tmp, "w2v.model"))
+            path = self._entry_dir(tenant_id, fingerprint)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            os.rename(tmp, path)
+        except OSError as e:
+            logger.error(f"Could not write suggestion cache entry for tenant {tenant_id}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    @staticmethod
+    def _size(path):
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits in `max_bytes`.
+        """
+        if not os.path.isdir(self.root):
+            return
+        entries = []
+        for tenant in os.listdir(self.root):
+            tenant_dir = os.path.join(self.root, tenant)
+            if not os.path.isdir(tenant_dir):
+                continue
+            for name in os.listdir(tenant_dir):
+                if name.startswith("."):
+                    continue  # entry being written
+                path = os.path.join(tenant_dir, name)
+                try:
+                    entries.append((os.path.getmtime(path), self._size(path), path))
+                except OSError:
+                    pass  # removed concurrently
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,110 @@
+import numpy as np
+from scipy.spatial.distance import pdist
+from sklearn.cluster import AgglomerativeClustering, Birch
+from sklearn.neighbors import kneighbors_graph
+
+
+def exact_threshold(X, percentile):
+    """
+    Percentile of every pairwise euclidean distance (O(n²) memory).
+    """
+    return np.percentile(pdist(X, metric="euclidean"), percentile)
+
+
+def sampled_threshold(X, percentile, sample_size, rng=None):
+    """
+    Estimates the percentile of the pairwise euclidean distances from `sample_size`
+    random pairs of distinct rows; falls back to the exact value when there are fewer pairs.
+    """
+    n = len(X)
+    if n * (n - 1) // 2 <= sample_size:
+        return exact_threshold(X, percentile)
+    rng = np.random.default_rng(rng)
+    i = rng.integers(0, n, sample_size)
+    j = rng.integers(0, n - 1, sample_size)
+    j = j + (j >= i)  # never pair a row with itself
+    distances = np.linalg.norm(X[i] - X[j], axis=1)
+    return np.percentile(distances, percentile)
+
+
+def agglomerative_labels(X, thresh, config):
+    """
+    Exact average-linkage clustering (O(n²) memory); the default for small tenants.
+    """
+    return AgglomerativeClustering(
+        n_clusters=None,
+        distance_threshold=thresh,
+        metric="euclidean",
+        linkage="average"
+    ).fit_predict(X)
+
+
+def knn_graph_labels(X, thresh, config):
+    """
+    Average-linkage clustering restricted to merges along a kNN graph (O(n·k) memory).
+    """
+    connectivity = kneighbors_graph(
+        X, n_neighbors=min(config["clustering_knn"], len(X) - 1), include_self=False
+    )
+    return AgglomerativeClustering(
+        n_clusters=None,
+        distance_threshold=thresh,
+        metric="euclidean",
+        linkage="average",
+        connectivity=connectivity
+    ).fit_predict(X)
+
+
+def birch_labels(X, thresh, config):
+    """
+    Single-pass BIRCH clustering; subclusters have a radius of at most half the threshold distance.
+    """
+    return Birch(threshold=thresh / 2, n_clusters=None).fit_predict(X)
+
+
+# config["clustering"] -> (labels(X, thresh, config), threshold estimated from sampled pairs)
+CLUSTERING_MODES = {
+    "agglomerative": (agglomerative_labels, False),
+    "knn_graph": (knn_graph_labels, True),
+    "birch": (birch_labels, True),
+}
+
+
+def cluster_embeddings(X, config):
+    """
+    Clusters the embedding rows with the configured mode using a distance threshold at
+    config["threshold_percentile"] of the pairwise distances (pairs sampled with
+    config["random_state"] when set).
+
+    :return: Array with the cluster label of every row.
+    """
+    mode = CLUSTERING_MODES.get(config["clustering"])
+    if mode is None:
+        raise ValueError(f"Unsupported clustering mode: {config['clustering']}")
+    if len(X) < 2:
+        return np.zeros(len(X), dtype=np.int64)
+
+    labels_fn, sampled = mode
+    if sampled:
+        thresh = sampled_threshold(X, config["threshold_percentile"], config["threshold_sample_size"],
+                                   config.get("random_state"))
+    else:
+        thresh = exact_threshold(X, config["threshold_percentile"])
+    return labels_fn(X, thresh, config)
+
+
+def cluster_subset(X, rows, config):
+    """
+    Re-clusters only X[rows], with the threshold estimated on the whole embedding set.
+
+    :return: Array with the cluster label (starting at 0) of every row in `rows`.
+    """
+    mode = CLUSTERING_MODES.get(config["clustering"])
+    if mode is None:
+        raise ValueError(f"Unsupported clustering mode: {config['clustering']}")
+    if len(rows) < 2:
+        return np.zeros(len(rows), dtype=np.int64)
+
+    thresh = sampled_threshold(X, config["threshold_percentile"], config["threshold_sample_size"],
+                               config.get("random_state"))
+    return mode[0](X[rows], thresh, config)
@@ -0,0 +1,253 @@
+import itertools
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+import numpy as np
+from gensim.models import Word2Vec
+from node2vec import Node2Vec
+from scipy import sparse
+from sklearn.utils.extmath import randomized_svd
+
+
+def _adjacency(G):
+    """
+    Returns (nodes, A) where A is the weighted CSR adjacency matrix of G in `nodes` order.
+    """
+    nodes = list(G.nodes())
+    A = nx.to_scipy_sparse_array(G, nodelist=nodes, weight="weight", format="csr")
+    return nodes, sparse.csr_matrix(A, dtype=np.float64)
+
+
+def _rows_for(nodes, ids, Z):
+    position = {node: i for i, node in enumerate(nodes)}
+    return Z[[position[n] for n in ids]]
+
+
+def _vectors(model, ids):
+    return np.vstack([model.wv[str(n)] for n in ids])
+
+
+def stable_hash(token):
+    """
+    Process-independent replacement for hash() in Word2Vec vector initialisation
+    (Python salts str hashes per process, which changes the initial vectors).
+    """
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def word2vec_params(config):
+    """
+    Word2Vec threading and seeding options. With config["random_state"] set, training
+    is seeded and single-threaded: gensim is only reproducible with one worker thread.
+    """
+    seed = config.get("random_state")
+    if seed is None:
+        return {"workers": config["workers"]}
+    return {"workers": 1, "seed": seed, "hashfxn": stable_hash}
+
+
+def node2vec_embeddings(G, ids, config):
+    """
+    Reference backend: node2vec random walks + gensim Word2Vec.
+    Walk generation is pure Python and precomputes transition probabilities in memory.
+    """
+    n2v = Node2Vec(
+        G,
+        dimensions=config["emb_dim"],
+        walk_length=config["walk_length"],
+        num_walks=config["num_walks"],
+        weight_key="weight",
+        quiet=True,
+        seed=config.get("random_state"),
+    )
+    model = n2v.fit(window=config["window"], min_count=1, **word2vec_params(config))
+    return _vectors(model, ids), model
+
+
+def spectral_embeddings(G, ids, config):
+    """
+    Fast backend: truncated SVD of the degree-normalised one- and two-hop proximity
+    matrix of the weighted supervisor graph. Runs on sparse matrices in near-linear time.
+    """
+    nodes, A = _adjacency(G)
+    n = len(nodes)
+    dim = config["emb_dim"]
+
+    # Self loops keep isolated employees well defined
+    A = A + sparse.identity(n, format="csr")
+    inv_sqrt_deg = 1.0 / np.sqrt(np.asarray(A.sum(axis=1)).ravel())
+    D = sparse.diags(inv_sqrt_deg)
+    M = D @ A @ D
+    S = (M + M @ M).tocsr()
+
+    k = min(dim, n)
+    if n <= dim + 10:
+        U, sigma, _ = np.linalg.svd(S.toarray())
+        U, sigma = U[:, :k], sigma[:k]
+    else:
+        U, sigma, _ = randomized_svd(S, n_components=k, random_state=config.get("random_state"))
+    Z = U * np.sqrt(sigma)
+    if k < dim:
+        Z = np.hstack([Z, np.zeros((n, dim - k))])
+    return _rows_for(nodes, ids, Z), None
+
+
+class WalkCorpus:
+    """
+    Re-iterable corpus of first-order weighted random walks (node2vec with p = q = 1),
+    generated with NumPy for all walkers at once, chunk by chunk, so the full walk
+    matrix is never held in memory. Every iteration yields the same walks.
+
+    Args:
+        A (scipy.sparse.csr_matrix): Weighted adjacency matrix.
+        tokens (np.ndarray): Word (string) of each node, indexed like A.
+        num_walks (int): Walks started from every node.
+        walk_length (int): Maximum number of nodes per walk.
+        seed (int | None): Seed of the walks; None draws fresh entropy once per corpus.
+        start_nodes (np.ndarray | None): Nodes walks start from (defaults to every node).
+        chunk_size (int): Walks generated per NumPy batch.
+        workers (int): Threads generating chunks in parallel. Every chunk has its own
+            SeedSequence-derived generator, so the walks do not depend on the thread count.
+    """
+
+    def __init__(self, A, tokens, num_walks, walk_length, seed=None, start_nodes=None, chunk_size=50000,
+                 workers=1):
+        self.A = A
+        self.tokens = tokens
+        self.num_walks = num_walks
+        self.walk_length = walk_length
+        self.start_nodes = np.arange(A.shape[0]) if start_nodes is None else np.asarray(start_nodes)
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.entropy = np.random.SeedSequence(seed).entropy
+
+        data = A.data
+        self._cum = np.cumsum(data)
+        self._row_start_cum = np.concatenate(([0.0], self._cum))[A.indptr[:-1]]
+        self._row_weight = np.asarray(A.sum(axis=1)).ravel()
+
+    def __len__(self):
+        return self.num_walks * len(self.start_nodes)
+
+    def chunk_rng(self, chunk_id):
+        return np.random.default_rng(np.random.SeedSequence(self.entropy, spawn_key=(chunk_id,)))
+
+    def walks(self, starts, rng):
+        """
+        Walks from every node in `starts` at once.
+        Returns an int array (len(starts), walk_length) padded with -1 after dead ends.
+        """
+        indptr, indices = self.A.indptr, self.A.indices
+        walks = np.full((len(starts), self.walk_length), -1, dtype=np.int64)
+        walks[:, 0] = starts
+        cur = np.array(starts, dtype=np.int64)
+        alive = self._row_weight[cur] > 0
+        for step in range(1, self.walk_length):
+            idx = np.nonzero(alive)[0]
+            if idx.size == 0:
+                break
+            c = cur[idx]
+            target = self._row_start_cum[c] + rng.random(idx.size) * self._row_weight[c]
+            pos = np.searchsorted(self._cum, target, side="right")
+            pos = np.minimum(pos, indptr[c + 1] - 1)  # guard against float rounding
+            nxt = indices[pos]
+            walks[idx, step] = nxt
+            cur[idx] = nxt
+            alive[idx] = self._row_weight[nxt] > 0
+        return walks
+
+    def iter_chunks(self):
+        """
+        Yields (chunk_id, start nodes) for every batch of walks.
+        """
+        total = len(self)
+        n_starts = len(self.start_nodes)
+        for chunk_id, lo in enumerate(range(0, total, self.chunk_size)):
+            hi = min(lo + self.chunk_size, total)
+            yield chunk_id, self.start_nodes[np.arange(lo, hi) % n_starts]
+
+    def _chunk_walks(self, chunk):
+        chunk_id, starts = chunk
+        return self.walks(starts, self.chunk_rng(chunk_id))
+
+    def _iter_walks(self):
+        if self.workers == 1:
+            yield from map(self._chunk_walks, self.iter_chunks())
+            return
+        chunks = self.iter_chunks()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                group = list(itertools.islice(chunks, self.workers))
+                if not group:
+                    break
+                yield from executor.map(self._chunk_walks, group)
+
+    def __iter__(self):
+        for walks in self._iter_walks():
+            for row in walks:
+                yield self.tokens[row[row >= 0]].tolist()
+
+
+def train_word2vec(corpus, config):
+    """
+    Trains skip-gram Word2Vec on a walk corpus (see word2vec_params for threads and seeding).
+    """
+    return Word2Vec(
+        sentences=corpus,
+        vector_size=config["emb_dim"],
+        window=config["window"],
+        min_count=1,
+        sg=1,
+        **word2vec_params(config),
+    )
+
+
+def walk_embeddings(G, ids, config):
+    """
+    Fast backend: NumPy-vectorized weighted random walks + multi-worker Word2Vec.
+    Equivalent in distribution to node2vec with its default p = q = 1.
+    """
+    nodes, A = _adjacency(G)
+    tokens = np.array([str(node) for node in nodes], dtype=object)
+    corpus = WalkCorpus(A, tokens, config["num_walks"], config["walk_length"],
+                        seed=config.get("random_state"), workers=config["workers"])
+    model = train_word2vec(corpus, config)
+    return _vectors(model, ids), model
+
+
+def update_walk_embeddings(model, G, ids, config, start_ids):
+    """
+    Fine-tunes a trained Word2Vec model on walks started only from `start_ids`
+    (new vocabulary is added) and returns the updated embeddings of `ids`.
+    """
+    nodes, A = _adjacency(G)
+    tokens = np.array([str(node) for node in nodes], dtype=object)
+    position = {node: i for i, node in enumerate(nodes)}
+    start_nodes = sorted(position[n] for n in start_ids if n in position)
+    if start_nodes:
+        corpus = WalkCorpus(A, tokens, config["num_walks"], config["walk_length"],
+                            seed=config.get("random_state"), start_nodes=start_nodes, workers=config["workers"])
+        model.workers = word2vec_params(config)["workers"]
+        model.build_vocab(corpus, update=True)
+        model.train(corpus, total_examples=len(corpus), epochs=model.epochs)
+    return _vectors(model, ids)
+
+
+# config["embedding_backend"] -> backend(G, ids, config) returning (an (len(ids), emb_dim) array,
+# the trained Word2Vec model or None)
+EMBEDDING_BACKENDS = {
+    "node2vec": node2vec_embeddings,
+    "spectral": spectral_embeddings,
+    "walks": walk_embeddings,
+}
+
+# Backends whose Word2Vec model can be fine-tuned by update_walk_embeddings
+INCREMENTAL_BACKENDS = ("node2vec", "walks")
+
+
+def compute_embeddings(G, ids, config):
+    backend = EMBEDDING_BACKENDS.get(config["embedding_backend"])
+    if backend is None:
+        raise ValueError(f"Unsupported embedding backend: {config['embedding_backend']}")
+    return backend(G, ids, config)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from app.ml.clustering import cluster_subset
+
+
+def _edges(graph):
+    edges = set()
+    for emp_id, direct, functional in zip(graph["ids"], graph["direct"], graph["functional"]):
+        if direct:
+            edges.add((emp_id, direct, "direct"))
+        if functional:
+            edges.add((emp_id, functional, "functional"))
+    return edges
+
+
+def diff_org_charts(old_graph, new_graph):
+    """
+    Compares two org charts (as stored by SuggestionCache.graph_of).
+
+    :return: Tuple (affected, change_ratio) where `affected` holds the added employees and
+             both ends of every added or removed supervisor edge, and `change_ratio` is the
+             number of added, removed or re-parented employees over the previous headcount.
+    """
+    old_ids, new_ids = set(old_graph["ids"]), set(new_graph["ids"])
+    changed_edges = _edges(old_graph) ^ _edges(new_graph)
+
+    affected = (new_ids - old_ids) | {node for edge in changed_edges for node in edge[:2]}
+    reparented = {edge[0] for edge in changed_edges} & old_ids & new_ids
+    change_ratio = (len(old_ids ^ new_ids) + len(reparented)) / max(len(old_ids), 1)
+    return affected, change_ratio
+
+
+def expand_affected(G, affected):
+    """
+    Affected nodes still in the graph plus their direct neighbours.
+    """
+    present = [n for n in affected if n in G]
+    expanded = set(present)
+    for n in present:
+        expanded.update(G.neighbors(n))
+    return expanded
+
+
+def relabel_impacted(old_graph, old_labels, new_ids, affected, X, config):
+    """
+    Keeps the previous cluster labels of unaffected employees and re-clusters the rest:
+    new employees, affected employees and every member of a cluster that held one.
+    New labels are offset past the previous ones so they never collide.
+
+    :return: Array with the cluster label of every employee in `new_ids`.
+    """
+    previous = dict(zip(old_graph["ids"], np.asarray(old_labels).tolist()))
+    impacted = {previous[n] for n in affected if n in previous}
+    rows = [
+        pos for pos, emp_id in enumerate(new_ids)
+        if emp_id not in previous or emp_id in affected or previous[emp_id] in impacted
+    ]
+    labels = np.array([previous.get(emp_id, -1) for emp_id in new_ids], dtype=np.int64)
+    if rows:
+        offset = max(previous.values(), default=-1) + 1
+        labels[rows] = cluster_subset(X, rows, config) + offset
+    return labels
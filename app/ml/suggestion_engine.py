@@ -1,13 +1,19 @@
+import itertools
+import os
+import tempfile
+
 import networkx as nx
 import numpy as np
 import pandas as pd
-from scipy.spatial.distance import pdist
 from flask_sqlalchemy import SQLAlchemy
-from node2vec import Node2Vec
-from sklearn.cluster import AgglomerativeClustering
 from sklearn.neighbors import NearestNeighbors
 
+from app.ml.cache import SuggestionCache
+from app.ml.clustering import cluster_embeddings
+from app.ml.embeddings import INCREMENTAL_BACKENDS, compute_embeddings, spectral_embeddings, update_walk_embeddings
+from app.ml.incremental import diff_org_charts, expand_affected, relabel_impacted
 from app.models import Employee
+from app.utils import logger
 
 
 class SuggestionEngine:
@@ -18,12 +24,16 @@ class SuggestionEngine:
         engine = SuggestionEngine(db, tenant_id, config)
         suggestions = engine.assign_suggestions()
         # suggestions is a dict { employee_number: [{employee_number, relation}, ...] }
+
+    Employees already loaded by the caller (rows exposing Employee.GRAPH_COLUMNS)
+    can be passed with `employees=` to skip the engine's own query.
     """
 
     def __init__(self,
                  db: SQLAlchemy,
                  tenant_id: str,
-                 config: dict = None):
+                 config: dict = None,
+                 employees=None):
         self.db = db
         self.tenant_id = tenant_id
 
@@ -34,20 +44,38 @@ class SuggestionEngine:
             "threshold_percentile": 50,        # for dynamic clustering cutoff
             "knn_k": 5,                        # K in KNN index
             "top_k": 3,                        # how many targets per employee
+            "embedding_backend": "node2vec",   # node2vec | spectral | walks (see app.ml.embeddings)
+            "walk_length": 30,                 # random walk length (node2vec, walks)
+            "num_walks": 100,                  # walks started per node (node2vec, walks)
+            "window": 5,                       # Word2Vec context window (node2vec, walks)
+            "workers": 1,                      # Word2Vec worker threads (walks)
+            "clustering": "agglomerative",     # agglomerative | knn_graph | birch (see app.ml.clustering)
+            "clustering_knn": 15,              # neighbours per node in the knn_graph connectivity
+            "threshold_sample_size": 200000,   # sampled pairs for the threshold (knn_graph, birch)
+            "cache_dir": os.getenv(            # on-disk suggestion cache; None disables it
+                "SUGGESTION_CACHE_DIR",
+                os.path.join(tempfile.gettempdir(), "magnethics_suggestions")
+            ),
+            "cache_max_bytes": int(os.getenv("SUGGESTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+            "incremental_max_change": 0.05,    # max changed share of the org chart since the last full retrain
+                                               # for incremental updates (0 disables)
+            "incremental_max_chain": 10,       # max incremental updates chained after a full retrain
+            "mode": "embedding",               # embedding | structural (peers from the supervisor tree)
+            "random_state": None,              # seed for walks, Word2Vec, SVD and threshold sampling
+            "structural_window": 8,            # siblings/cousins inspected per source (structural)
+            "structural_fallback_size": 5000,  # max graph neighbourhood embedded for short employees (structural)
         }
         self.config = {**defaults, **(config or {})}
 
-        # Fetch employees once
-        self.employees = self._get_employees()
+        # Fetch employees once (callers that already loaded the tenant pass them in)
+        self.employees = employees if employees is not None else self._get_employees()
         # internal IDs for graph
         self.ids = [e.id for e in self.employees]
         # public identifiers for lookup
         self.numbers = [e.employee_number for e in self.employees]
 
     def _get_employees(self):
-        return (self.db.session.query(Employee)
-                    .filter_by(client_id=self.tenant_id)
-                    .all())
+        return Employee.load_columns(self.tenant_id, Employee.GRAPH_COLUMNS, self.db.session)
 
     def _build_weighted_graph(self):
         direct_w, func_w = self.config["weight_ratio"]
@@ -61,28 +89,52 @@ class SuggestionEngine:
         return G
 
     def _compute_embeddings(self, G):
-        n2v = Node2Vec(
-            G,
-            dimensions=self.config["emb_dim"],
-            walk_length=30,
-            num_walks=100,
-            weight_key="weight",
-            quiet=True,
-        )
-        model = n2v.fit(window=5, min_count=1)
-        X = np.vstack([model.wv[str(n)] for n in self.ids])
-        return X
+        return compute_embeddings(G, self.ids, self.config)
 
     def _cluster_embeddings(self, X):
-        pairwise = pdist(X, metric="euclidean")
-        thresh = np.percentile(pairwise, self.config["threshold_percentile"])
-        clust = AgglomerativeClustering(
-            n_clusters=None,
-            distance_threshold=thresh,
-            metric="euclidean",
-            linkage="average"
+        return cluster_embeddings(X, self.config)
+
+    def _incremental_update(self, G, graph, previous):
+        """
+        Updates a previous cache entry of the tenant to the current org chart:
+        fine-tunes its Word2Vec model on walks from the affected employees and
+        re-clusters only the impacted clusters.
+
+        Chained updates are measured against the last full retrain: the change ratios
+        accumulated since then (the entry's lineage) must stay within
+        incremental_max_change, and at most incremental_max_chain updates are chained.
+
+        :return: Tuple (X, labels, model, lineage), or None when a full retrain is required
+                 (other backend or config, no saved model or lineage, or too many changes).
+        """
+        if self.config["embedding_backend"] not in INCREMENTAL_BACKENDS:
+            return None
+        if previous["graph"].get("config") != SuggestionCache.config_fingerprint(self.config):
+            return None
+        lineage = previous["graph"].get("lineage")
+        if lineage is None or lineage["chain"] >= self.config["incremental_max_chain"]:
+            return None
+        affected, change_ratio = diff_org_charts(previous["graph"], graph)
+        drift = lineage["drift"] + change_ratio
+        if drift > self.config["incremental_max_change"]:
+            return None
+        try:
+            model = SuggestionCache.load_model(previous)
+        except Exception as e:
+            logger.warning(f"Could not load cached Word2Vec model for tenant {self.tenant_id}: {e}")
+            return None
+        if model is None:
+            return None
+
+        start_ids = expand_affected(G, affected)
+        X = update_walk_embeddings(model, G, self.ids, self.config, start_ids)
+        labels = relabel_impacted(previous["graph"], previous["labels"], self.ids, affected, X, self.config)
+        logger.info(
+            f"Incremental suggestion update for tenant {self.tenant_id}: "
+            f"{len(affected)} affected employees ({change_ratio:.1%} of the org chart, "
+            f"{drift:.1%} since the last full retrain)"
         )
-        return clust.fit_predict(X)
+        return X, labels, model, {"drift": drift, "chain": lineage["chain"] + 1}
 
     def _build_cluster_knn(self, X, labels):
         knn_index = {}
@@ -97,58 +149,255 @@ class SuggestionEngine:
             knn_index[c] = (knn, idxs)
         return knn_index
 
-    def _suggest_for_one(self, e, X, labels, knn_index):
+    def _build_indexes(self):
+        """
+        Precomputes the lookups used while suggesting:
+            index_by_id: employee id -> position in self.employees
+            children:    supervisor id -> positions of its direct reports (in employee order)
+        """
+        index_by_id = {}
+        for i, emp_id in enumerate(self.ids):
+            index_by_id.setdefault(emp_id, i)
+        children = {}
+        for i, e in enumerate(self.employees):
+            if e.direct_supervisor_id:
+                children.setdefault(e.direct_supervisor_id, []).append(i)
+        return index_by_id, children
+
+    def _batch_neighbors(self, X, knn_index):
+        """
+        Queries each cluster's KNN index once for all of its members.
+        Returns, for every employee position, the positions of its nearest
+        cluster mates ordered by distance (including itself).
+        """
+        MAX = self.config["top_k"]
+        neighbors = [None] * len(self.employees)
+        for c, (knn, idxs) in knn_index.items():
+            _, nbrs = knn.kneighbors(X[idxs], n_neighbors=min(len(idxs), MAX + 1))
+            for row, i in enumerate(idxs):
+                neighbors[i] = idxs[nbrs[row]]
+        return neighbors
+
+    def _suggest_for_one(self, i, neighbors, index_by_id, children):
         suggestions = []
         MAX = self.config["top_k"]
+        e = self.employees[i]
+        suggested = set()
+
+        def add(emp_num, relation):
+            suggestions.append((emp_num, relation))
+            suggested.add(emp_num)
 
         # 1) Self-evaluation
-        suggestions.append((e.employee_number, "Autoevaluación"))
+        add(e.employee_number, "Autoevaluación")
 
         # 2) Direct supervisor
         if e.direct_supervisor_id:
-            sup = next((x for x in self.employees if x.id == e.direct_supervisor_id), None)
-            if sup:
-                suggestions.append((sup.employee_number, "Jefe directo"))
+            j = index_by_id.get(e.direct_supervisor_id)
+            if j is not None:
+                add(self.employees[j].employee_number, "Jefe directo")
 
         # 3) Subordinates (Colaboradores)
-        subordinates = [emp for emp in self.employees if emp.direct_supervisor_id == e.id]
-        for sub in subordinates:
+        for j in children.get(e.id, []):
             if len(suggestions) >= MAX:
                 break
-            suggestions.append((sub.employee_number, "Colaborador"))
+            add(self.employees[j].employee_number, "Colaborador")
 
         # 4) Homologous peers from same cluster
-        i = self.ids.index(e.id)
-        c = labels[i]
-        knn, idxs = knn_index[c]
-        dists, nbrs = knn.kneighbors([X[i]], n_neighbors=min(len(idxs), MAX + 1))
-
-        for nb in nbrs[0]:
-            peer = self.employees[idxs[nb]]
+        for j in neighbors:
+            if len(suggestions) >= MAX:
+                break
+            peer = self.employees[j]
             if peer.id == e.id:
                 continue  # skip self
-            peer_num = peer.employee_number
-            already_suggested = [x[0] for x in suggestions]
-            if peer_num not in already_suggested and len(suggestions) < MAX:
-                suggestions.append((peer_num, "Homólogo"))
+            if peer.employee_number not in suggested and len(suggestions) < MAX:
+                add(peer.employee_number, "Homólogo")
 
         return suggestions
 
+    def _build_structure(self, index_by_id, children):
+        """
+        Array parent pointers of the org chart, by employee position:
+            parent:      position of the direct supervisor (-1 when not in the tenant)
+            rank:        position among the direct supervisor's reports
+            frank:       position among the functional supervisor's reports
+            fchildren:   functional supervisor id -> positions of its functional reports
+        """
+        n = len(self.employees)
+        parent = np.full(n, -1, dtype=np.int64)
+        rank = np.zeros(n, dtype=np.int64)
+        frank = np.zeros(n, dtype=np.int64)
+        fchildren = {}
+        for i, e in enumerate(self.employees):
+            if e.direct_supervisor_id:
+                parent[i] = index_by_id.get(e.direct_supervisor_id, -1)
+            if e.functional_supervisor_id:
+                fchildren.setdefault(e.functional_supervisor_id, []).append(i)
+        for reports in children.values():
+            rank[reports] = np.arange(len(reports))
+        for reports in fchildren.values():
+            frank[reports] = np.arange(len(reports))
+        return parent, rank, frank, fchildren
+
+    @staticmethod
+    def _window(items, pos, limit):
+        """
+        Up to `limit` items around items[pos] in circular order (+1, -1, +2, -2, ...), excluding it.
+        """
+        n = len(items)
+        out = []
+        for step in range(1, min(n, limit + 1)):
+            offset = (step + 1) // 2 if step % 2 else -(step // 2)
+            out.append(items[(pos + offset) % n])
+        return out
+
+    def _structural_candidates(self, i, structure, children):
+        """
+        Yields peer candidates of employee i from the supervisor tree, closest first:
+        siblings under the direct supervisor, siblings under the functional supervisor
+        and cousins (reports of the direct supervisor's siblings).
+        """
+        parent, rank, frank, fchildren = structure
+        limit = self.config["structural_window"]
+        e = self.employees[i]
+        if e.direct_supervisor_id:
+            yield from self._window(children[e.direct_supervisor_id], rank[i], limit)
+        if e.functional_supervisor_id:
+            yield from self._window(fchildren[e.functional_supervisor_id], frank[i], limit)
+        p = parent[i]
+        if p >= 0 and self.employees[p].direct_supervisor_id:
+            uncles = self._window(children[self.employees[p].direct_supervisor_id], rank[p], limit)
+            for uncle in uncles:
+                yield from children.get(self.employees[uncle].id, [])[:limit]
+
+    def _neighbourhood(self, G, sources):
+        """
+        Breadth-first ball around `sources` in G, closest nodes first, capped at
+        config["structural_fallback_size"] nodes (the sources are always included).
+        """
+        limit = max(self.config["structural_fallback_size"], len(sources))
+        seen = dict.fromkeys(sources)
+        frontier = list(seen)
+        while frontier and len(seen) < limit:
+            next_frontier = []
+            for node in frontier:
+                for nbr in G.neighbors(node):
+                    if nbr not in seen and len(seen) < limit:
+                        seen[nbr] = None
+                        next_frontier.append(nbr)
+            frontier = next_frontier
+        return list(seen)
+
+    def _embedding_neighbors(self, rows):
+        """
+        Nearest employees in embedding space for the given positions.
+
+        Only the graph neighbourhood of those employees is embedded, with the spectral
+        backend (no Word2Vec training), so the cost is bounded by
+        config["structural_fallback_size"] rather than by the tenant size.
+        Returns, for every row, employee positions ordered by distance (including itself).
+        """
+        G = self._build_weighted_graph()
+        ball = set(self._neighbourhood(G, [self.ids[i] for i in rows]))
+        positions = np.array([i for i, emp_id in enumerate(self.ids) if emp_id in ball])
+        row_of = {i: row for row, i in enumerate(positions)}
+
+        X, _ = spectral_embeddings(G.subgraph(ball), [self.ids[i] for i in positions], self.config)
+        knn = NearestNeighbors(
+            n_neighbors=min(len(positions), self.config["top_k"] + 1),
+            metric="euclidean"
+        ).fit(X)
+        _, nbrs = knn.kneighbors(X[[row_of[i] for i in rows]])
+        return positions[nbrs]
+
+    def _assign_structural(self):
+        """
+        Structural mode: peers come from the supervisor tree in linear time. Employees
+        left with fewer than top_k suggestions get embedding neighbours computed on
+        their own graph neighbourhood (see _embedding_neighbors).
+        """
+        MAX = self.config["top_k"]
+        index_by_id, children = self._build_indexes()
+        structure = self._build_structure(index_by_id, children)
+
+        results = []
+        short = []
+        for i in range(len(self.employees)):
+            suggestions = self._suggest_for_one(
+                i, self._structural_candidates(i, structure, children), index_by_id, children
+            )
+            results.append(suggestions)
+            if len(suggestions) < MAX:
+                short.append(i)
+
+        if short and len(self.employees) > 1:
+            logger.info(f"Embedding fallback for {len(short)} employees of tenant {self.tenant_id}")
+            for i, nbrs in zip(short, self._embedding_neighbors(short)):
+                candidates = itertools.chain(self._structural_candidates(i, structure, children), nbrs)
+                results[i] = self._suggest_for_one(i, candidates, index_by_id, children)
+        return results
+
+    def _to_output(self, results):
+        return {
+            e.employee_number: [
+                {"employee_number": emp_num, "relation": relation}
+                for emp_num, relation in suggestions
+            ]
+            for e, suggestions in zip(self.employees, results)
+        }
+
+    def _cache(self):
+        if not self.config["cache_dir"]:
+            return None
+        return SuggestionCache(self.config["cache_dir"], self.config["cache_max_bytes"])
+
     def assign_suggestions(self) -> dict:
         """
         Runs the pipeline and returns a map:
             { employee_number: [ {employee_number, relation}, ... ] }
+
+        Results are cached on disk per tenant and org chart fingerprint, so an
+        unchanged org chart with the same config is served without retraining.
+        When the org chart changed only slightly since the tenant's last cached run
+        (and since its last full retrain), embeddings and clusters are updated
+        incrementally instead.
+
+        With config["mode"] == "structural" peers are derived from the supervisor
+        tree instead (see _assign_structural) and the cache is not used.
         """
+        if self.config["mode"] == "structural":
+            return self._to_output(self._assign_structural())
+        if self.config["mode"] != "embedding":
+            raise ValueError(f"Unsupported suggestion mode: {self.config['mode']}")
+
+        cache = self._cache()
+        previous = None
+        if cache is not None:
+            graph = SuggestionCache.graph_of(self.employees)
+            fingerprint = SuggestionCache.fingerprint(graph, self.config)
+            cached = cache.load(self.tenant_id, fingerprint)
+            if cached is not None:
+                return cached["suggestions"]
+            if self.config["incremental_max_change"] > 0:
+                previous = cache.latest(self.tenant_id)
+
         G = self._build_weighted_graph()
-        X = self._compute_embeddings(G)
-        labels = self._cluster_embeddings(X)
+        update = self._incremental_update(G, graph, previous) if previous is not None else None
+        if update is not None:
+            X, labels, model, lineage = update
+        else:
+            X, model = self._compute_embeddings(G)
+            labels = self._cluster_embeddings(X)
+            lineage = {"drift": 0.0, "chain": 0}
         knn_index = self._build_cluster_knn(X, labels)
+        neighbors = self._batch_neighbors(X, knn_index)
+        index_by_id, children = self._build_indexes()
 
-        out = {}
-        for e in self.employees:
-            suggestions = self._suggest_for_one(e, X, labels, knn_index)
-            out[e.employee_number] = [
-                {"employee_number": emp_num, "relation": relation}
-                for emp_num, relation in suggestions
-            ]
+        out = self._to_output(
+            self._suggest_for_one(i, neighbors[i], index_by_id, children)
+            for i in range(len(self.employees))
+        )
+
+        if cache is not None:
+            cache.store(self.tenant_id, fingerprint, X, labels, out, graph, self.config, model, lineage)
         return out
@@ -4,6 +4,9 @@ from app.models.employee_survey_assignment import EmployeeSurveyAssignment
 from app.models.employee import Employee
 from app.models.stages import Stages
 from app.models.survey import Survey
+from app.models.survey_answers import SurveyAnswers
+from app.models.survey_results import SurveyResults
+from app.models.job import Job
 from app.models.scale_options import ScaleOptions
 from app.models.event import Event
 from app.models.client import Client
\ No newline at end of file
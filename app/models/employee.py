@@ -1,4 +1,5 @@
 from app.services import db
+from sqlalchemy import select
 from datetime import datetime
 import uuid
 
@@ -6,6 +7,9 @@ import uuid
 class Employee(db.Model):
     __tablename__ = 'employees'
 
+    # Columns the org chart graph (SuggestionEngine) is built from
+    GRAPH_COLUMNS = ("id", "employee_number", "direct_supervisor_id", "functional_supervisor_id")
+
     id = db.Column(db.String(255), primary_key=True)
     employee_number = db.Column(db.Integer, nullable=False, index=True)
     first_name = db.Column(db.String(255), nullable=False)
@@ -110,6 +114,21 @@ class Employee(db.Model):
         db.session.commit()
         return employee
 
+    @staticmethod
+    def load_columns(client_id, columns, session=None):
+        """
+        Fetches only the given columns of a client's employees, ordered by id,
+        as lightweight rows instead of ORM objects.
+        :param client_id: ID of the client.
+        :param columns: Names of the Employee columns to fetch.
+        :param session: Session or Connection to run the query on (defaults to db.session).
+        :return: List of rows (tuples with attribute access by column name).
+        """
+        query = (select(*[getattr(Employee, column) for column in columns])
+                 .where(Employee.client_id == client_id)
+                 .order_by(Employee.id))
+        return (session or db.session).execute(query).all()
+
     @staticmethod
     def get_employee(employee_id):
         """
@@ -1,14 +1,30 @@
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateColumn
 from app.services import db
+from app.utils import logger
 
 class EmployeeSurveyAssignment(db.Model):
     __tablename__ = 'employee_survey_assignments'
 
+    # One assignment per (evaluator, survey, evaluated, relation). MySQL unique indexes
+    # treat NULLs as distinct, so the index covers the nullable target fields through
+    # stored generated columns that coalesce them to ''.
+    KEY_FIELDS = ("employee_id", "survey_id", "target_employee_id", "target_type")
+    KEY_INDEX = "uq_employee_survey_assignment_target_key"
+    # Earlier index over the nullable columns, replaced by ensure_indexes()
+    LEGACY_KEY_INDEX = "uq_employee_survey_assignment_key"
+    __table_args__ = (
+        db.Index(KEY_INDEX, "employee_id", "survey_id", "target_employee_key", "target_type_key", unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     employee_id = db.Column(db.String(36), db.ForeignKey('employees.id'), nullable=False)
     survey_id = db.Column(db.String(255), nullable=False)
     survey_type = db.Column(db.String(50), nullable=False)
     target_employee_id = db.Column(db.String(36), db.ForeignKey('employees.id'), nullable=True)
     target_type = db.Column(db.String(50), nullable=True)  # "employee", "company", etc.
+    target_employee_key = db.Column(db.String(36), db.Computed("COALESCE(target_employee_id, '')", persisted=True))
+    target_type_key = db.Column(db.String(50), db.Computed("COALESCE(target_type, '')", persisted=True))
 
 
     def __repr__(self):
@@ -24,6 +40,69 @@ class EmployeeSurveyAssignment(db.Model):
             "target_type": self.target_type
         }
 
+    @classmethod
+    def key_of(cls, values):
+        """
+        Unique key of an assignment given as a mapping of KEY_FIELDS (a dict or a row's
+        _mapping), compared like the unique index does: a missing target equals ''.
+        """
+        return tuple(values[field] or "" for field in cls.KEY_FIELDS)
+
+    def key(self):
+        return self.key_of({field: getattr(self, field) for field in self.KEY_FIELDS})
+
+    @staticmethod
+    def normalize_target_type(value):
+        """
+        Relation of an imported assignment: blank cells are stored as NULL.
+        """
+        if value is None:
+            return None
+        return str(value).strip() or None
+
+    @staticmethod
+    def ensure_indexes():
+        """
+        Migrates an existing table to the unique assignment key (db.create_all() only
+        covers newly created tables): adds the generated target_employee_key and
+        target_type_key columns, creates the unique index over them and then drops the
+        legacy index over the nullable columns.
+
+        Creating the index fails, and is logged, while the table still holds duplicated
+        assignments. Before deploying, normalise blank relations to NULL and remove the
+        duplicates (NULL and '' targets count as equal), keeping the oldest row:
+
+            UPDATE employee_survey_assignments SET target_type = NULL WHERE TRIM(target_type) = '';
+            DELETE a FROM employee_survey_assignments a
+            JOIN employee_survey_assignments b
+              ON a.employee_id = b.employee_id AND a.survey_id = b.survey_id
+             AND COALESCE(a.target_employee_id, '') = COALESCE(b.target_employee_id, '')
+             AND COALESCE(a.target_type, '') = COALESCE(b.target_type, '')
+             AND a.id > b.id;
+        """
+        table = EmployeeSurveyAssignment.__table__
+        try:
+            inspector = inspect(db.engine)
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            with db.engine.begin() as conn:
+                for column in (table.c.target_employee_key, table.c.target_type_key):
+                    if column.name not in columns:
+                        ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+            index = next(i for i in table.indexes if i.name == EmployeeSurveyAssignment.KEY_INDEX)
+            index.create(bind=db.engine, checkfirst=True)
+
+            # The new index (led by employee_id) backs the foreign key before the legacy one is dropped
+            if any(i["name"] == EmployeeSurveyAssignment.LEGACY_KEY_INDEX for i in inspector.get_indexes(table.name)):
+                # Bound to a detached copy of the table, so the model's metadata keeps only the new index
+                legacy_table = table.to_metadata(MetaData())
+                legacy = db.Index(EmployeeSurveyAssignment.LEGACY_KEY_INDEX,
+                                  *(legacy_table.c[field] for field in EmployeeSurveyAssignment.KEY_FIELDS))
+                legacy.drop(bind=db.engine)
+        except Exception as e:
+            logger.error(f"Could not create unique index on employee_survey_assignments: {e}")
+
     @staticmethod
     def create_assignment(data):
         assignment = EmployeeSurveyAssignment(**data)
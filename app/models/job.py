@@ -0,0 +1,143 @@
+import uuid
+from datetime import datetime
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from app.utils import logger
+
+
+class Job:
+    """
+    Repository for background jobs stored in the 'Jobs' collection.
+
+    Job documents look like:
+        {
+            "_id", "kind", "params", "status",    # queued | running | completed | failed | expired
+            "owner",                               # "<host>:<pid>" of the web worker that runs it
+            "created_at", "started_at", "finished_at",
+            "artifact_path", "artifact_size", "filename", "mimetype", "error"
+        }
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    EXPIRED = "expired"
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """
+        Creates the indexes used by artifact retention and eviction.
+        """
+        try:
+            self.collection.create_index([("status", ASCENDING), ("finished_at", ASCENDING)], name="job_retention")
+        except Exception as e:
+            logger.error(f"Could not create index on Jobs: {e}")
+
+    def create(self, kind, params, owner=None):
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "params": params,
+            "status": self.QUEUED,
+            "owner": owner,
+            "created_at": datetime.utcnow()
+        }
+        self.collection.insert_one(job)
+        return job
+
+    def get(self, job_id):
+        return self.collection.find_one({"_id": job_id})
+
+    def mark_running(self, job_id):
+        self.collection.update_one(
+            {"_id": job_id},
+            {"$set": {"status": self.RUNNING, "started_at": datetime.utcnow()}}
+        )
+
+    def mark_completed(self, job_id, artifact_path, artifact_size, filename, mimetype):
+        self.collection.update_one(
+            {"_id": job_id},
+            {"$set": {
+                "status": self.COMPLETED,
+                "finished_at": datetime.utcnow(),
+                "artifact_path": artifact_path,
+                "artifact_size": artifact_size,
+                "filename": filename,
+                "mimetype": mimetype
+            }}
+        )
+
+    def mark_failed(self, job_id, error):
+        self.collection.update_one(
+            {"_id": job_id},
+            {"$set": {"status": self.FAILED, "finished_at": datetime.utcnow(), "error": error}}
+        )
+
+    def fail_many(self, job_ids, error):
+        """
+        Marks several queued or running jobs as failed.
+        """
+        if not job_ids:
+            return 0
+        return self.collection.update_many(
+            {"_id": {"$in": job_ids}, "status": {"$in": [self.QUEUED, self.RUNNING]}},
+            {"$set": {"status": self.FAILED, "finished_at": datetime.utcnow(), "error": error}}
+        ).modified_count
+
+    def mark_expired(self, job_id):
+        self.collection.update_one(
+            {"_id": job_id},
+            {"$set": {"status": self.EXPIRED, "artifact_path": None, "artifact_size": 0}}
+        )
+
+    def finished_before(self, cutoff):
+        """
+        Returns the jobs that finished (in any final state) before `cutoff`.
+        """
+        return list(self.collection.find(
+            {"status": {"$in": [self.COMPLETED, self.FAILED, self.EXPIRED]}, "finished_at": {"$lt": cutoff}},
+            {"artifact_path": 1}
+        ))
+
+    def unfinished(self):
+        """
+        Returns the jobs that are still queued or running.
+        """
+        return list(self.collection.find(
+            {"status": {"$in": [self.QUEUED, self.RUNNING]}},
+            {"owner": 1, "created_at": 1}
+        ))
+
+    def completed_artifacts(self):
+        """
+        Returns the completed jobs holding an artifact, oldest first.
+        """
+        return list(self.collection.find(
+            {"status": self.COMPLETED, "artifact_path": {"$ne": None}},
+            {"artifact_path": 1, "artifact_size": 1}
+        ).sort("finished_at", ASCENDING))
+
+    def delete_many(self, job_ids):
+        if not job_ids:
+            return 0
+        return self.collection.delete_many({"_id": {"$in": job_ids}}).deleted_count
+
+    @staticmethod
+    def to_dict(job):
+        """
+        Serializes a job document for API responses (internal artifact paths are not exposed).
+        """
+        return {
+            "id": job["_id"],
+            "kind": job.get("kind"),
+            "params": job.get("params", {}),
+            "status": job.get("status"),
+            "created_at": job.get("created_at"),
+            "started_at": job.get("started_at"),
+            "finished_at": job.get("finished_at"),
+            "filename": job.get("filename"),
+            "error": job.get("error")
+        }
@@ -1,3 +1,4 @@
+from pymongo import UpdateOne
 from pymongo.collection import Collection
 from bson.objectid import ObjectId
 from app.utils import logger
@@ -110,6 +111,7 @@ class Survey:
             "stage_ids": self.stage_ids,
             "scale_options": self.scale_options,
             "questions": self.questions,
+            **self.question_index({"questions": self.questions}),
             "product_id": self.product_id,
             "survey_type": self.survey_type,
             "sindicalizados": self.sindicalizados,  # Nuevo campo incluido
@@ -117,3 +119,56 @@ class Survey:
         }
         result = self.survey_collection.insert_one(survey_doc)
         return result.inserted_id
+
+    @staticmethod
+    def extract_question_ids(blocks):
+        """
+        Flattens question blocks into the ordered list of unique, non-empty question ids.
+        Questions may be dictionaries with an "id" key or plain id strings.
+        """
+        question_ids = []
+        seen = set()
+        for block in blocks or []:
+            for q in block.get("questions", []):
+                qid = ""
+                if isinstance(q, dict):
+                    qid = q.get("id", "")
+                elif isinstance(q, str):
+                    qid = q
+                if isinstance(qid, str) and qid.strip() and qid.strip() not in seen:
+                    seen.add(qid.strip())
+                    question_ids.append(qid.strip())
+        return question_ids
+
+    @staticmethod
+    def question_index(survey_doc):
+        """
+        Builds the precomputed question index stored on survey documents:
+            {"question_ids": [...], "question_count": n}
+        Blocks are read from "questionBlocks" or, failing that, "questions".
+        """
+        blocks = survey_doc.get("questionBlocks") or survey_doc.get("questions", [])
+        question_ids = Survey.extract_question_ids(blocks)
+        return {"question_ids": question_ids, "question_count": len(question_ids)}
+
+    @staticmethod
+    def backfill_question_index(survey_collection: Collection, batch_size: int = 500):
+        """
+        Stores "question_ids" and "question_count" on every survey document that lacks them.
+
+        :return: Number of survey documents updated.
+        """
+        cursor = survey_collection.find(
+            {"question_ids": {"$exists": False}},
+            {"questionBlocks.questions": 1, "questions.questions": 1}
+        )
+        updated = 0
+        operations = []
+        for doc in cursor:
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": Survey.question_index(doc)}))
+            if len(operations) >= batch_size:
+                updated += survey_collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += survey_collection.bulk_write(operations, ordered=False).modified_count
+        return updated
@@ -0,0 +1,143 @@
+from datetime import datetime
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+from app.utils import logger
+
+
+class SurveyAnswers:
+    """
+    Repository for the 'SurveyAnswers' collection.
+
+    Each document is uniquely identified by
+    (survey_id, employee_id, target_employee_id, target_type) and is persisted
+    with atomic upserts, so concurrent autosaves never create duplicates.
+    Every write also maintains the progress counters (answered_question_ids,
+    answered_count, progress) read by the status dashboard.
+    """
+
+    KEY_FIELDS = ("survey_id", "employee_id", "target_employee_id", "target_type")
+    KEY_INDEX_NAME = "survey_answer_key"
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """
+        Creates the unique compound index on the answer key fields.
+        If legacy duplicates prevent the index from being built, the error is logged
+        and the application keeps running without the constraint.
+        """
+        try:
+            self.collection.create_index(
+                [(field, ASCENDING) for field in self.KEY_FIELDS],
+                name=self.KEY_INDEX_NAME,
+                unique=True
+            )
+            logger.info(f"Ensured unique index {self.KEY_INDEX_NAME} on SurveyAnswers")
+        except OperationFailure as e:
+            logger.error(f"Could not create unique index {self.KEY_INDEX_NAME} on SurveyAnswers: {e}")
+
+    @staticmethod
+    def key(survey_id, employee_id, target_employee_id, target_type):
+        return {
+            "survey_id": survey_id,
+            "employee_id": employee_id,
+            "target_employee_id": target_employee_id,
+            "target_type": target_type
+        }
+
+    @staticmethod
+    def answered_question_ids(answers_list):
+        """
+        Returns the set of question ids that have a non-empty answer in `answers_list`.
+        Answers may be {"question_id", "answer"} dictionaries or plain id strings.
+        """
+        answered_ids = set()
+        for answer in answers_list or []:
+            qid = ""
+            value = None
+            if isinstance(answer, dict):
+                qid = answer.get("question_id", "")
+                value = answer.get("answer", None)
+            elif isinstance(answer, str):
+                qid = answer
+                value = answer  # fallback
+
+            if (
+                isinstance(qid, str)
+                and qid.strip()
+                and value not in [None, "", [], {}]
+            ):
+                answered_ids.add(qid.strip())
+        return answered_ids
+
+    @staticmethod
+    def progress_fields(answers_list, question_ids):
+        """
+        Computes the progress counters stored alongside the answers:
+            {"answered_question_ids": [...], "answered_count": n, "progress": pct}
+        Only answers to questions that belong to the survey are counted.
+        """
+        question_set = set(question_ids or [])
+        answered = sorted(SurveyAnswers.answered_question_ids(answers_list) & question_set)
+        progress = (len(answered) / len(question_set)) * 100 if question_set else 0
+        return {
+            "answered_question_ids": answered,
+            "answered_count": len(answered),
+            "progress": progress
+        }
+
+    @staticmethod
+    def _upsert_update(answers_list, status, current_time, question_ids):
+        return {
+            "$set": {
+                "answers": answers_list,
+                "status": status,
+                "last_updated": current_time,
+                **SurveyAnswers.progress_fields(answers_list, question_ids)
+            },
+            "$setOnInsert": {"created_at": current_time}
+        }
+
+    def upsert(self, survey_id, employee_id, target_employee_id, target_type, answers_list, status,
+               question_ids=None):
+        """
+        Saves a single answer document with one atomic update_one(upsert=True).
+        """
+        current_time = datetime.utcnow()
+        return self.collection.update_one(
+            self.key(survey_id, employee_id, target_employee_id, target_type),
+            self._upsert_update(answers_list, status, current_time, question_ids),
+            upsert=True
+        )
+
+    def upsert_many(self, survey_id, employee_id, blocks, status, question_ids=None):
+        """
+        Saves several answer documents for the same evaluator.
+
+        :param blocks: List of (answers_list, target_employee_id, target_type) tuples.
+        :param status: "in_progress" or "completed".
+        :param question_ids: Question ids of the survey, used to maintain the progress counters.
+        :return: Tuple (inserted, updated) with the number of documents affected.
+        """
+        if not blocks:
+            return 0, 0
+
+        if len(blocks) == 1:
+            answers_list, target_employee_id, target_type = blocks[0]
+            result = self.upsert(survey_id, employee_id, target_employee_id, target_type,
+                                 answers_list, status, question_ids)
+            return (1 if result.upserted_id is not None else 0), result.matched_count
+
+        current_time = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                self.key(survey_id, employee_id, target_employee_id, target_type),
+                self._upsert_update(answers_list, status, current_time, question_ids),
+                upsert=True
+            )
+            for answers_list, target_employee_id, target_type in blocks
+        ]
+        result = self.collection.bulk_write(operations, ordered=True)
+        return result.upserted_count, result.matched_count
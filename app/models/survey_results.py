@@ -0,0 +1,132 @@
+from datetime import datetime
+from pymongo import ASCENDING, ReplaceOne
+from pymongo.collection import Collection
+from app.utils import logger
+
+
+class SurveyResults:
+    """
+    Materialized results snapshot stored in the 'SurveyResults' collection.
+
+    There is one document per completed answer document (sharing its _id):
+        {
+            "_id", "survey_id", "client_id",
+            "employee_id", "target_employee_id", "target_type",
+            "closed": [rows], "open": [rows], "refreshed_at"
+        }
+    where rows are the flattened export rows built by SurveyService.
+
+    Snapshot documents are always written with replace_one(upsert=True) keyed by _id,
+    so concurrent rebuilds and refreshes of the same survey never collide.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """
+        Creates the index used to read a survey's snapshot and to drop an evaluator's rows.
+        """
+        try:
+            self.collection.create_index(
+                [("survey_id", ASCENDING), ("employee_id", ASCENDING)],
+                name="survey_results_owner"
+            )
+        except Exception as e:
+            logger.error(f"Could not create index on SurveyResults: {e}")
+
+    def _upsert(self, snapshots):
+        if snapshots:
+            self.collection.bulk_write(
+                [ReplaceOne({"_id": snapshot["_id"]}, snapshot, upsert=True) for snapshot in snapshots],
+                ordered=False
+            )
+        return len(snapshots)
+
+    def replace_survey(self, survey_id, snapshots, batch_size: int = 500):
+        """
+        Replaces every snapshot document of a survey: the new ones are upserted in batches
+        and the documents not rewritten by this rebuild are removed afterwards.
+
+        :param snapshots: Iterable of snapshot documents (each with a "refreshed_at"
+                          taken while iterating).
+        :return: Number of snapshot documents written.
+        """
+        # Mongo stores milliseconds; truncate so rows written in the same millisecond survive
+        started_at = datetime.utcnow()
+        started_at = started_at.replace(microsecond=started_at.microsecond // 1000 * 1000)
+
+        written = 0
+        batch = []
+        for snapshot in snapshots:
+            batch.append(snapshot)
+            if len(batch) >= batch_size:
+                written += self._upsert(batch)
+                batch = []
+        written += self._upsert(batch)
+
+        self.collection.delete_many({"survey_id": survey_id, "refreshed_at": {"$lt": started_at}})
+        return written
+
+    def replace_for_keys(self, survey_id, employee_id, keys, snapshots):
+        """
+        Replaces the snapshot documents of one evaluator for the given answer keys.
+
+        :param keys: List of (target_employee_id, target_type) tuples being refreshed.
+        :param snapshots: New snapshot documents for the keys that are completed.
+        """
+        if not keys:
+            return
+        query = self.keys_query(survey_id, employee_id, keys)
+        if snapshots:
+            query["_id"] = {"$nin": [snapshot["_id"] for snapshot in snapshots]}
+        self.collection.delete_many(query)
+        self._upsert(snapshots)
+
+    @staticmethod
+    def keys_query(survey_id, employee_id, keys):
+        """
+        Builds the query matching one evaluator's documents for the given answer keys.
+
+        :param keys: Non-empty list of (target_employee_id, target_type) tuples.
+        """
+        return {
+            "survey_id": survey_id,
+            "employee_id": employee_id,
+            "$or": [
+                {"target_employee_id": target_employee_id, "target_type": target_type}
+                for target_employee_id, target_type in keys
+            ]
+        }
+
+    def delete_for_keys(self, survey_id, employee_id, keys):
+        """
+        Removes the snapshot documents of one evaluator for the given answer keys.
+
+        :param keys: List of (target_employee_id, target_type) tuples.
+        """
+        if not keys:
+            return 0
+        return self.delete(self.keys_query(survey_id, employee_id, keys))
+
+    def delete(self, query):
+        """
+        Removes the snapshot documents matching an answer query (survey_id, employee_id, ...).
+        """
+        return self.collection.delete_many(query).deleted_count
+
+    def iter_rows(self, survey_id, batch_size: int = 500):
+        """
+        Streams the snapshot rows of a survey.
+
+        Yields:
+            Tuples ("closed", row) or ("open", row).
+        """
+        cursor = self.collection.find(
+            {"survey_id": survey_id}, {"closed": 1, "open": 1}
+        ).batch_size(batch_size)
+        for doc in cursor:
+            for row in doc.get("closed", []):
+                yield "closed", row
+            for row in doc.get("open", []):
+                yield "open", row
@@ -6,4 +6,5 @@ from app.routes.scale_options_routes import scale_options
 from app.routes.client_routes import client
 from app.routes.event_routes import event
 from app.routes.product_routes import product
-from app.routes.consultant_routes import consultant
\ No newline at end of file
+from app.routes.consultant_routes import consultant
+from app.routes.job_routes import job
\ No newline at end of file
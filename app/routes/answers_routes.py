@@ -1,14 +1,112 @@
 from flask import request, jsonify, Blueprint, current_app, g
 from datetime import datetime
 from app.utils import logger
+from app.utils.streaming import iter_file_chunks
 from app.services import db
-from app.models import EmployeeSurveyAssignment, Employee
+from app.models import EmployeeSurveyAssignment, Employee, Survey, SurveyAnswers, SurveyResults, Job
 from app.middleware import token_required 
 from app.services.survey_service import SurveyService
+from app.services.survey_renderer import get_survey_template, overlay_answers, survey_version
+from app.services.job_service import JobService, async_requested
 
 
 answers = Blueprint("answer", __name__)
 
+# Fields of a survey document needed by the status dashboard
+STATUS_SURVEY_PROJECTION = {
+    "title": 1,
+    "subtitle": 1,
+    "deadline": 1,
+    "handInDate": 1,
+    "survey_type": 1,
+    "question_ids": 1,
+    "question_count": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
+# Question tree of surveys created before the question index was stored
+QUESTION_TREE_PROJECTION = {
+    "questionBlocks.questions": 1,
+    "questions.questions": 1
+}
+
+
+def _survey_question_ids(surveys_coll, survey_doc):
+    """
+    Returns the question ids of a survey fetched with at least the "question_ids" field,
+    walking the question tree for surveys that predate the stored index.
+    """
+    if "question_ids" in survey_doc:
+        return survey_doc["question_ids"]
+    tree_doc = surveys_coll.find_one({"_id": survey_doc["_id"]}, QUESTION_TREE_PROJECTION) or {}
+    return Survey.question_index(tree_doc)["question_ids"]
+
+
+def _resolve_answer_blocks(employee_id, survey_id, employee_answers):
+    """
+    Matches every block of `employee_answers` against the employee's assignments
+    for the survey, fetched with a single SQL query.
+
+    Returns a tuple (resolved, error). `resolved` is a list of
+    (answers_list, target_employee_id, target_type) tuples; `error` is a Flask
+    response tuple when a block is invalid, unassigned (403) or ambiguous (409).
+    """
+    assignments = db.session.query(EmployeeSurveyAssignment).filter_by(
+        employee_id=employee_id,
+        survey_id=survey_id
+    ).all()
+
+    resolved = []
+    for emp_ans in employee_answers:
+        answers_list = emp_ans.get('answers')
+        if answers_list is None:
+            logger.error("Missing 'answers' in one of the employee answers")
+            return None, (jsonify({"error": "Invalid employee answer data"}), 400)
+
+        # Optional: target_employee_id (for 360 surveys) and target_type
+        target_employee_id = emp_ans.get('target_employee_id')
+        target_type = emp_ans.get('target_type')
+
+        matches = [
+            a for a in assignments
+            if (not target_employee_id or a.target_employee_id == target_employee_id)
+            and (not target_type or a.target_type == target_type)
+        ]
+        if not matches:
+            logger.error(f"No assignment for employee={employee_id}, survey={survey_id}")
+            return None, (jsonify({
+                "error": f"Employee {employee_id} not assigned to survey {survey_id}"
+            }), 403)
+
+        if len(matches) > 1:
+            logger.error(
+                f"Ambiguous assignment for employee={employee_id}, survey={survey_id} (multiple targets)."
+            )
+            return None, (jsonify({
+                "error": "Ambiguous assignment. Multiple matches found for this employee and survey."
+            }), 409)
+
+        assignment = matches[0]
+        resolved.append((answers_list, assignment.target_employee_id, assignment.target_type))
+
+    return resolved, None
+
+
+def _write_answer_blocks(answers_coll, survey_id, employee_id, resolved, status, question_ids):
+    """
+    Upserts every resolved block into SurveyAnswers through the answer repository.
+    Documents are keyed by (survey_id, employee_id, target_employee_id, target_type).
+    """
+    inserted, updated = SurveyAnswers(answers_coll).upsert_many(
+        survey_id, employee_id, resolved, status, question_ids
+    )
+    logger.info(
+        f"Saved {len(resolved)} {status} blocks for survey={survey_id}, employee={employee_id} "
+        f"(inserted={inserted}, updated={updated})"
+    )
+
+
 # Route 1: Save Survey Progress
 @answers.route('/<survey_id>/save', methods=['POST'])
 @token_required()
@@ -39,86 +137,28 @@ def save_survey_progress(survey_id):
         surveys_coll = mongo_db.get_collection("Surveys")
         answers_coll = mongo_db.get_collection("SurveyAnswers")
 
-        # Validate survey exists in Mongo
-        survey_doc = surveys_coll.find_one({"_id": survey_id})
+        # Validate survey exists in Mongo (only its question index is needed here)
+        survey_doc = surveys_coll.find_one({"_id": survey_id}, {"question_ids": 1})
         if not survey_doc:
             logger.error(f"Survey {survey_id} not found in Mongo")
             return jsonify({"error": "Survey not found"}), 404
 
-        # Process each block of answers; any provided employee_id is overridden by token's id.
-        for emp_ans in employee_answers:
-            answers_list = emp_ans.get('answers')
-            if answers_list is None:
-                logger.error("Missing 'answers' in one of the employee answers")
-                return jsonify({"error": "Invalid employee answer data"}), 400
-
-            # Optional: target_employee_id (for 360 surveys) and target_type
-            target_employee_id = emp_ans.get('target_employee_id')
-            target_type = emp_ans.get('target_type')
-
-            # Verify assignment in SQL using token employee_id
-            query = db.session.query(EmployeeSurveyAssignment).filter_by(
-                employee_id=employee_id,
-                survey_id=survey_id
+        # Resolve every block against the employee's assignments in a single query;
+        # any provided employee_id is overridden by token's id.
+        resolved, error = _resolve_answer_blocks(employee_id, survey_id, employee_answers)
+        if error:
+            return error
+
+        # Save or update all drafts in SurveyAnswers with one bulk upsert
+        _write_answer_blocks(answers_coll, survey_id, employee_id, resolved, "in_progress",
+                             _survey_question_ids(surveys_coll, survey_doc))
+
+        # Drafts are no longer completed: drop their rows from the results snapshot
+        if resolved:
+            keys = [(target_emp, target_type) for _, target_emp, target_type in resolved]
+            SurveyService(mongo_db=mongo_db, db=db).discard_results_snapshot(
+                survey_id, SurveyResults.keys_query(survey_id, employee_id, keys)
             )
-            if target_employee_id:
-                query = query.filter_by(target_employee_id=target_employee_id)
-            if target_type:
-                query = query.filter_by(target_type=target_type)
-
-            assignments = query.all()
-            if not assignments:
-                logger.error(f"No assignment for employee={employee_id}, survey={survey_id}")
-                return jsonify({
-                    "error": f"Employee {employee_id} not assigned to survey {survey_id}"
-                }), 403
-
-            if len(assignments) > 1:
-                logger.error(
-                    f"Ambiguous assignment for employee={employee_id}, survey_id={survey_id} (multiple targets)."
-                )
-                return jsonify({
-                    "error": "Ambiguous assignment. Multiple matches found for this employee and survey."
-                }), 409
-
-            assignment = assignments[0]
-            final_target_emp = assignment.target_employee_id
-            final_target_type = assignment.target_type
-
-            # Save or update the draft in SurveyAnswers
-            existing_doc = answers_coll.find_one({
-                "survey_id": survey_id,
-                "employee_id": employee_id,
-                "target_employee_id": final_target_emp,
-                "target_type": final_target_type
-            })
-
-            current_time = datetime.utcnow()
-            if existing_doc:
-                answers_coll.update_one(
-                    {"_id": existing_doc["_id"]},
-                    {
-                        "$set": {
-                            "answers": answers_list,
-                            "status": "in_progress",
-                            "last_updated": current_time
-                        }
-                    }
-                )
-                logger.info(f"Updated in_progress for survey={survey_id}, employee={employee_id}, target={final_target_emp}")
-            else:
-                new_doc = {
-                    "survey_id": survey_id,
-                    "employee_id": employee_id,
-                    "target_employee_id": final_target_emp,
-                    "target_type": final_target_type,
-                    "answers": answers_list,
-                    "status": "in_progress",
-                    "created_at": current_time,
-                    "last_updated": current_time
-                }
-                answers_coll.insert_one(new_doc)
-                logger.info(f"Saved new progress for survey={survey_id}, employee={employee_id}, target={final_target_emp}")
 
         return jsonify({"message": "Survey progress saved successfully"}), 200
 
@@ -152,80 +192,21 @@ def submit_survey(survey_id):
         surveys_coll = mongo_db.get_collection("Surveys")
         answers_coll = mongo_db.get_collection("SurveyAnswers")
 
-        survey_doc = surveys_coll.find_one({"_id": survey_id})
+        survey_doc = surveys_coll.find_one({"_id": survey_id}, {"question_ids": 1})
         if not survey_doc:
             logger.error(f"Survey {survey_id} not found in Mongo")
             return jsonify({"error": "Survey not found"}), 404
 
-        for emp_ans in employee_answers:
-            answers_list = emp_ans.get('answers')
-            if answers_list is None:
-                logger.error("Missing 'answers' in one of the employee answers")
-                return jsonify({"error": "Invalid employee answer data"}), 400
+        resolved, error = _resolve_answer_blocks(employee_id, survey_id, employee_answers)
+        if error:
+            return error
 
-            target_employee_id = emp_ans.get('target_employee_id')
-            target_type = emp_ans.get('target_type')
+        _write_answer_blocks(answers_coll, survey_id, employee_id, resolved, "completed",
+                             _survey_question_ids(surveys_coll, survey_doc))
 
-            query = db.session.query(EmployeeSurveyAssignment).filter_by(
-                employee_id=employee_id,
-                survey_id=survey_id
-            )
-            if target_employee_id:
-                query = query.filter_by(target_employee_id=target_employee_id)
-            if target_type:
-                query = query.filter_by(target_type=target_type)
-
-            assignments = query.all()
-            if not assignments:
-                logger.error(f"No assignment for employee={employee_id}, survey={survey_id}")
-                return jsonify({
-                    "error": f"Employee {employee_id} not assigned to survey {survey_id}"
-                }), 403
-
-            if len(assignments) > 1:
-                logger.error(
-                    f"Ambiguous assignment for employee={employee_id}, survey={survey_id} (multiple targets)."
-                )
-                return jsonify({
-                    "error": "Ambiguous assignment. Multiple matches found for this employee and survey."
-                }), 409
-
-            assignment = assignments[0]
-            final_target_emp = assignment.target_employee_id
-            final_target_type = assignment.target_type
-
-            current_time = datetime.utcnow()
-            filter_doc = {
-                "survey_id": survey_id,
-                "employee_id": employee_id,
-                "target_employee_id": final_target_emp,
-                "target_type": final_target_type
-            }
-            result = answers_coll.update_one(
-                filter_doc,
-                {
-                    "$set": {
-                        "answers": answers_list,
-                        "status": "completed",
-                        "last_updated": current_time
-                    }
-                }
-            )
-            if result.matched_count == 0:
-                new_doc = {
-                    "survey_id": survey_id,
-                    "employee_id": employee_id,
-                    "target_employee_id": final_target_emp,
-                    "target_type": final_target_type,
-                    "answers": answers_list,
-                    "status": "completed",
-                    "created_at": current_time,
-                    "last_updated": current_time
-                }
-                answers_coll.insert_one(new_doc)
-                logger.info(f"Created new submission for survey={survey_id}, employee={employee_id}, target={final_target_emp}")
-            else:
-                logger.info(f"Updated existing submission for survey={survey_id}, employee={employee_id}, target={final_target_emp}")
+        # Incrementally refresh the materialized results of the submitted documents
+        keys = [(target_emp, target_type) for _, target_emp, target_type in resolved]
+        SurveyService(mongo_db=mongo_db, db=db).refresh_results_snapshot(survey_id, employee_id, keys)
 
         return jsonify({"message": "Survey submitted successfully"}), 200
 
@@ -306,6 +287,7 @@ def delete_survey_answers(survey_id):
             query["target_type"] = target_type
 
         result = answers_coll.delete_many(query)
+        SurveyService(mongo_db=mongo_db, db=db).discard_results_snapshot(survey_id, query)
         if result.deleted_count == 0:
             logger.info(f"No answers found to delete for survey {survey_id} and employee {employee_id}")
             return jsonify({"error": "No answers found to delete"}), 404
@@ -321,6 +303,17 @@ def delete_survey_answers(survey_id):
 @answers.route('/surveys/status', methods=['GET'])
 @token_required()
 def get_surveys_by_status():
+    """
+    Categorizes the employee's assigned surveys into pending, in_progress and completed.
+
+    Everything is resolved set-wise: one SQL query for the assignments, one `$in`
+    fetch of the distinct surveys, one aggregation over SurveyAnswers and one bulk
+    Employee lookup for the evaluated targets of 360 surveys.
+
+    Progress is read from the answered_count / progress counters kept on each
+    SurveyAnswers document. Only documents written before the counters existed, or
+    before the survey's last edit, are recounted from their answered question ids.
+    """
     try:
         employee_id = g.user_id
         mongo_db = current_app.mongo_db
@@ -337,63 +330,127 @@ def get_surveys_by_status():
             "in_progress": [],
             "completed": []
         }
+        if not assignments:
+            return jsonify(categorized), 200
+
+        survey_ids = list({assignment.survey_id for assignment in assignments})
+        survey_docs = {
+            doc["_id"]: doc
+            for doc in surveys_coll.find({"_id": {"$in": survey_ids}}, STATUS_SURVEY_PROJECTION)
+        }
+
+        # Surveys without a stored question index fall back to walking the question tree
+        legacy_ids = [sid for sid, doc in survey_docs.items() if "question_ids" not in doc]
+        if legacy_ids:
+            for doc in surveys_coll.find({"_id": {"$in": legacy_ids}}, QUESTION_TREE_PROJECTION):
+                survey_docs[doc["_id"]].update(Survey.question_index(doc))
+
+        # Agrupar los documentos de respuestas por (survey, evaluado, tipo) en una sola agregación
+        # que sólo lee los contadores escalares de progreso.
+        answer_groups = {}
+        pipeline = [
+            {"$match": {"employee_id": employee_id, "survey_id": {"$in": survey_ids}}},
+            {"$group": {
+                "_id": {
+                    "survey_id": "$survey_id",
+                    "target_employee_id": {"$ifNull": ["$target_employee_id", None]},
+                    "target_type": {"$ifNull": ["$target_type", None]}
+                },
+                "documents": {"$sum": 1},
+                "progress": {"$max": "$progress"},
+                "without_counters": {"$sum": {"$cond": [{"$isNumber": "$answered_count"}, 0, 1]}},
+                "oldest_update": {"$min": "$last_updated"},
+                "statuses": {"$addToSet": "$status"}
+            }}
+        ]
+        for group in answers_coll.aggregate(pipeline):
+            key = (group["_id"]["survey_id"], group["_id"]["target_employee_id"], group["_id"]["target_type"])
+            answer_groups[key] = group
+
+        # Los contadores sólo son válidos si se escribieron después de la última edición de la
+        # encuesta; los demás grupos (documentos anteriores a los contadores, encuestas editadas
+        # o duplicados heredados) recalculan el progreso desde answered_question_ids / answers.
+        # Las encuestas importadas pueden guardar created_at como {"$date": ...}: esas fechas no
+        # se comparan.
+        stale_keys = set()
+        for key, group in answer_groups.items():
+            stamp = survey_version(survey_docs.get(key[0]) or {})
+            oldest_update = group.get("oldest_update")
+            edited_since = isinstance(stamp, datetime) and (
+                not isinstance(oldest_update, datetime) or oldest_update < stamp
+            )
+            if group["documents"] != 1 or group["without_counters"] or edited_since:
+                stale_keys.add(key)
 
-        from app.models.employee import Employee
+        answered_ids_by_key = {}
+        if stale_keys:
+            stale_pipeline = [
+                {"$match": {
+                    "employee_id": employee_id,
+                    "survey_id": {"$in": list({key[0] for key in stale_keys})}
+                }},
+                {"$project": {
+                    "survey_id": 1,
+                    "target_employee_id": 1,
+                    "target_type": 1,
+                    "answered_question_ids": {"$ifNull": ["$answered_question_ids", []]},
+                    "answers": {
+                        "$cond": [
+                            {"$isArray": "$answered_question_ids"},
+                            [],
+                            {"$ifNull": ["$answers", []]}
+                        ]
+                    }
+                }}
+            ]
+            for doc in answers_coll.aggregate(stale_pipeline):
+                key = (doc["survey_id"], doc.get("target_employee_id"), doc.get("target_type"))
+                if key not in stale_keys:
+                    continue
+                answered_ids = answered_ids_by_key.setdefault(key, set())
+                answered_ids.update(doc.get("answered_question_ids", []))
+                answered_ids.update(SurveyAnswers.answered_question_ids(doc.get("answers", [])))
+
+        # Nombres de los evaluados en encuestas 360
+        target_ids = {
+            assignment.target_employee_id
+            for assignment in assignments
+            if assignment.target_employee_id
+            and assignment.survey_id in survey_docs
+            and survey_docs[assignment.survey_id].get("survey_type", "").lower() == "360"
+        }
+        evaluated_names = {}
+        if target_ids:
+            rows = (db.session.query(Employee.id, Employee.first_name, Employee.last_name_paternal)
+                    .filter(Employee.id.in_(target_ids))
+                    .all())
+            evaluated_names = {row.id: f"{row.first_name} {row.last_name_paternal}" for row in rows}
 
         for assignment in assignments:
             sid = assignment.survey_id
-            survey_doc = surveys_coll.find_one({"_id": sid})
+            survey_doc = survey_docs.get(sid)
             if not survey_doc:
                 continue
 
-            # Obtener preguntas válidas del survey
-            blocks = survey_doc.get("questionBlocks") or survey_doc.get("questions", [])
-            question_ids = set()
-            for block in blocks:
-                questions = block.get("questions", [])
-                for q in questions:
-                    qid = ""
-                    if isinstance(q, dict):
-                        qid = q.get("id", "")
-                    elif isinstance(q, str):
-                        qid = q
-                    if isinstance(qid, str) and qid.strip():
-                        question_ids.add(qid.strip())
-
+            question_list = survey_doc.get("question_ids") or []
+            question_ids = set(question_list)
             total_questions = len(question_ids)
             if total_questions == 0:
                 logger.warning(f"Survey {sid} has no valid questions.")
                 progress = 0
                 any_completed = False
             else:
-                filter_doc = {
-                    "survey_id": sid,
-                    "employee_id": employee_id,
-                    "target_employee_id": assignment.target_employee_id,
-                    "target_type": assignment.target_type
-                }
-                all_answer_docs = list(answers_coll.find(filter_doc))
-                answered_ids = set()
-                for ans_doc in all_answer_docs:
-                    for answer in ans_doc.get("answers", []):
-                        qid = ""
-                        value = None
-                        if isinstance(answer, dict):
-                            qid = answer.get("question_id", "")
-                            value = answer.get("answer", None)
-                        elif isinstance(answer, str):
-                            qid = answer
-                            value = answer  # fallback
-
-                        if (
-                            isinstance(qid, str)
-                            and qid.strip()
-                            and value not in [None, "", [], {}]
-                        ):
-                            answered_ids.add(qid.strip())
-
-                progress = (len(answered_ids & question_ids) / total_questions) * 100
-                any_completed = any(doc.get("status") == "completed" for doc in all_answer_docs)
+                key = (sid, assignment.target_employee_id, assignment.target_type)
+                group = answer_groups.get(key)
+                progress = 0
+                any_completed = False
+                if group:
+                    any_completed = "completed" in group.get("statuses", [])
+                    if key in stale_keys:
+                        answered_count = len(answered_ids_by_key.get(key, set()) & question_ids)
+                        progress = (answered_count / total_questions) * 100
+                    else:
+                        progress = group.get("progress") or 0
 
             # Determinar la categoría
             if any_completed:
@@ -406,9 +463,7 @@ def get_surveys_by_status():
             # Título dinámico para encuestas 360
             title = survey_doc.get("title", "Untitled Survey")
             if survey_doc.get("survey_type", "").lower() == "360" and assignment.target_employee_id:
-                evaluated = db.session.get(Employee, assignment.target_employee_id)
-                if evaluated:
-                    title = f"{evaluated.first_name} {evaluated.last_name_paternal}"
+                title = evaluated_names.get(assignment.target_employee_id, title)
 
             survey_data = {
                 "id": sid,
@@ -418,7 +473,7 @@ def get_surveys_by_status():
                 "progress": round(progress, 2),
                 "assignmentDate": survey_doc.get("deadline", ""),
                 "handInDate": survey_doc.get("handInDate", ""),
-                "questions": list(question_ids)
+                "questions": list(question_list)
             }
             categorized[category].append(survey_data)
 
@@ -441,7 +496,8 @@ def get_survey(id, target_employee_id):
             return jsonify({"error": "Database not initialized"}), 500
 
         surveys_collection = db_mongo.get_collection("Surveys")
-        survey_doc = surveys_collection.find_one({"_id": id})
+        # El árbol de preguntas sólo se lee cuando la plantilla no está en caché
+        survey_doc = surveys_collection.find_one({"_id": id}, {"questions": 0})
         if not survey_doc:
             return jsonify({"message": "Survey not found"}), 404
 
@@ -454,69 +510,18 @@ def get_survey(id, target_employee_id):
                     survey_doc["target_employee_id"] = evaluated.id
         # Recuperar respuestas del evaluador (si existen)
         answers_coll = db_mongo.get_collection("SurveyAnswers")
-        answer_doc = answers_coll.find_one({"survey_id": id, "employee_id": employee_id, "target_employee_id": target_employee_id})
+        answer_doc = answers_coll.find_one(
+            {"survey_id": id, "employee_id": employee_id, "target_employee_id": target_employee_id},
+            {"answers": 1}
+        )
         user_answers = {}
         if answer_doc:
             for ans in answer_doc.get("answers", []):
                 key = ans.get("question_id")
                 user_answers[key] = ans.get("answer")
 
-        def convert_question_id(qid):
-            digits = "".join(filter(str.isdigit, qid))
-            try:
-                return int(digits)
-            except Exception:
-                return 0
-
-        blocks = survey_doc.get("questions", [])
-        transformed_blocks = []
-        for block in blocks:
-            block_title = block.get("title", "")
-            block_description = block.get("description", "")
-            block_scale_options = block.get("scaleOptions", [])
-            transformed_questions = []
-            for q in block.get("questions", []):
-                orig_id = q.get("id", "")
-                raw_type = q.get("type", "").lower()
-                if "selección" in raw_type or "seleccion" in raw_type:
-                    q_type = "scale"
-                elif "abierta" in raw_type:
-                    q_type = "open"
-                else:
-                    q_type = "scale"
-                transformed_question = {
-                    "id": orig_id,
-                    "type": q_type,
-                    "text": q.get("text", ""),
-                    "answer": user_answers.get(orig_id, None)
-                }
-                if q_type == "scale":
-                    if q.get("options") is not None:
-                        transformed_question["options"] = [
-                            {"label": opt.get("label", ""), "value": int(opt.get("value", 0))}
-                            for opt in q.get("options", [])
-                        ]
-                    else:
-                        transformed_question["options"] = [
-                            {"label": opt.get("label", ""), "value": int(opt.get("value", 0))}
-                            for opt in block_scale_options
-                        ]
-                if "minLength" in q:
-                    transformed_question["minLength"] = q["minLength"]
-                if "maxLength" in q:
-                    transformed_question["maxLength"] = q["maxLength"]
-                transformed_questions.append(transformed_question)
-            transformed_block = {
-                "title": block_title,
-                "description": block_description,
-                "scaleOptions": (
-                    [{"label": opt.get("label", ""), "value": int(opt.get("value", 0))}
-                     for opt in block_scale_options]
-                    if block_scale_options else None
-                ),
-                "questions": transformed_questions
-            }
-            transformed_blocks.append(transformed_block)
+        template_blocks = get_survey_template(surveys_collection, survey_doc)
+        transformed_blocks = overlay_answers(template_blocks, user_answers)
 
         if "created_at" in survey_doc:
             created_at = survey_doc["created_at"]
@@ -544,20 +549,69 @@ def get_survey(id, target_employee_id):
 
 @answers.route("/<survey_id>/<client_id>", methods=["GET"])
 def get_answers(survey_id, client_id):
+    """
+    Downloads the survey results workbook. With ?async=true the export runs as a
+    background job and a 202 response with the job is returned (see /job/<job_id>).
+    """
     try:
         mongo_db = current_app.mongo_db
 
         if not mongo_db:
             return jsonify({"error": "Database not initialized"}), 500
+        if async_requested(request.args):
+            new_job = JobService(mongo_db, current_app.config).enqueue(
+                "results_export", {"survey_id": survey_id, "client_id": client_id}
+            )
+            return jsonify({"message": "Job enqueued", "job": Job.to_dict(new_job)}), 202
+
         answer_service = SurveyService(db=db, mongo_db=mongo_db)
 
         answers = answer_service.get_excel(survey_id, client_id)
         return current_app.response_class(
-            answers,
-           mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            iter_file_chunks(answers),
+            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename=results_{survey_id}.xlsx"}
         )
     except Exception as e:
         logger.critical("Error getting answers", exc_info=e)
         return jsonify({"error": "Internal Server Error"}), 500
         
+
+
+@answers.route("/<survey_id>/<client_id>/results", methods=["GET"])
+def get_aggregated_answers(survey_id, client_id):
+    """
+    Returns aggregated results of a survey as JSON: count, average and value
+    distribution of the closed answers per competence and per evaluated employee.
+    """
+    try:
+        mongo_db = current_app.mongo_db
+
+        if not mongo_db:
+            return jsonify({"error": "Database not initialized"}), 500
+        answer_service = SurveyService(db=db, mongo_db=mongo_db)
+
+        results = answer_service.get_aggregated_results(survey_id, client_id)
+        return jsonify(results), 200
+    except Exception as e:
+        logger.critical("Error getting aggregated answers", exc_info=e)
+        return jsonify({"error": "Internal Server Error"}), 500
+
+
+@answers.route("/<survey_id>/<client_id>/results/rebuild", methods=["POST"])
+def rebuild_results(survey_id, client_id):
+    """
+    Rebuilds the materialized results snapshot of a survey from all of its answers.
+    """
+    try:
+        mongo_db = current_app.mongo_db
+
+        if not mongo_db:
+            return jsonify({"error": "Database not initialized"}), 500
+        answer_service = SurveyService(db=db, mongo_db=mongo_db)
+
+        count = answer_service.rebuild_results_snapshot(survey_id, client_id)
+        return jsonify({"message": "Results snapshot rebuilt", "answers": count}), 200
+    except Exception as e:
+        logger.critical("Error rebuilding results snapshot", exc_info=e)
+        return jsonify({"error": "Internal Server Error"}), 500
@@ -1,14 +1,20 @@
-from flask import request, jsonify, Blueprint, g
+from flask import request, jsonify, Blueprint, g, current_app
 from app.models import Employee, Client
 from app.services import db
 from app.utils import logger
 from app.config import CLERK_CLIENT
 from app.middleware import postman_consultant_token_required, token_required
+from app.services.clerk_provisioning import ClerkProvisioner
+from app.services.employee_import_service import EmployeeImportService
+from app.services.survey_service import invalidate_employee_names
+from app.utils.upload_normalization import missing_columns
 import pandas as pd
-import time
 
 bp = Blueprint("employee", __name__)
 
+# Employee fields copied into the survey results snapshots
+NAME_FIELDS = {"first_name", "last_name_paternal", "last_name_maternal"}
+
 @bp.route("/", methods=["POST"])
 @postman_consultant_token_required
 def create_employee():
@@ -94,6 +100,8 @@ def update_employee(id):
         updated_employee = Employee.update_employee(employee_id=id, data=data)
         if updated_employee is None:
             return jsonify({"error": "Employee doesn't exist"}), 404
+        if NAME_FIELDS & data.keys() and current_app.mongo_db:
+            invalidate_employee_names(current_app.mongo_db, updated_employee.client_id)
 
         return jsonify({"message": "Employee updated!", "data": updated_employee.to_dict()}), 200
     except Exception as e:
@@ -104,9 +112,13 @@ def update_employee(id):
 @postman_consultant_token_required
 def delete_employee(id):
     try:
+        employee = Employee.get_employee(id)
+        client_id = employee.client_id if employee else None
         result = Employee.delete_employee(id)
         if not result:
             return jsonify({"error": "Employee doesn't exist"}), 404
+        if client_id and current_app.mongo_db:
+            invalidate_employee_names(current_app.mongo_db, client_id)
         return jsonify({"message": "Employee deleted successfully"}), 200
     except Exception as e:
         logger.critical("Error deleting an employee", exc_info=e)
@@ -134,7 +146,16 @@ def get_employee_info():
 def upload_employees(client_id):
     """
     Upload an Excel or CSV file to create employees in bulk.
+
+    Clerk users are created concurrently within CLERK_RATE_LIMIT_PER_SECOND
+    (see ClerkProvisioner) and rolled back if the upload fails.
     """
+    created_employees = []
+    provisioner = ClerkProvisioner(
+        CLERK_CLIENT,
+        rate_per_second=current_app.config["CLERK_RATE_LIMIT_PER_SECOND"],
+        max_workers=current_app.config["CLERK_PROVISIONING_WORKERS"]
+    )
     try:
         client = db.session.get(Client, client_id)
         if not client:
@@ -181,83 +202,40 @@ def upload_employees(client_id):
             "ID EMPLEADO JEFE FUNCIONAL": "functional_supervisor_number"
         }
 
-        missing_cols = [col for col in column_map if col not in df.columns]
+        missing_cols = missing_columns(df, column_map)
         if missing_cols:
             return jsonify({"error": f"Missing required columns: {missing_cols}"}), 400
 
-        number_to_clerk_id = {}
-        created = []
-        errors = []
-        created_employees = []
-
-        for idx, row in df.iterrows():
-            try:
-                logger.info(f"Processing row {idx + 1} {row}")
-                data = {new: row[old] for old, new in column_map.items()}
-
-                for k in ["direct_supervisor_number", "functional_supervisor_number"]:
-                    val = data.get(k)
-                    if pd.isna(val) or str(val).strip() == "":
-                        data[k] = None
-                    else:
-                        data[k] = str(val).split(".")[0]  # always store as string
-
-                data["client_id"] = client_id
-
-                user = CLERK_CLIENT.users.create(request={
-                    "email_address": [data["email"]],
-                    "public_metadata": {"user_type": "employee"}
-                })
-
-                time.sleep(0.8)
-
-                if not user:
-                    raise ValueError("Failed to create Clerk user")
-
-                data["id"] = user.id
-                created_employees.append(user.id)
-
-                number_to_clerk_id[str(data["employee_number"])] = user.id
-
-                sup_data = {
-                    "direct_number": data.pop("direct_supervisor_number", None),
-                    "func_number": data.pop("functional_supervisor_number", None),
-                }
-
-                employee = Employee.create_employee(data)  # must not commit
-                created.append({**sup_data, "employee": employee})
-
-            except Exception as e:
-                logger.error(f"Error processing row {idx}: {e}")
-                errors.append({"row": idx, "error": str(e)})
-
-        for item in created:
-            emp = item["employee"]
-            direct = item.get("direct_number")
-            func = item.get("func_number")
-
-            if direct and direct in number_to_clerk_id:
-                emp.direct_supervisor_id = number_to_clerk_id[direct]
-            if func and func in number_to_clerk_id:
-                emp.functional_supervisor_id = number_to_clerk_id[func]
-
-            db.session.add(emp)
-        db.session.commit()
+        # Validación y normalización vectorizada de toda la hoja antes de crear usuarios en Clerk
+        import_service = EmployeeImportService(db)
+        valid, errors = import_service.normalize(df, column_map)
+        for error in errors:
+            logger.error(f"Error processing row {error['row']}: {error['error']}")
+
+        # Alta concurrente en Clerk, limitada por la cuota de la API
+        user_ids, clerk_errors = provisioner.create_users([record["email"] for _, record in valid])
+        created_employees.extend(user_id for user_id in user_ids if user_id)
+
+        records = []
+        for pos, ((idx, record), user_id) in enumerate(zip(valid, user_ids)):
+            if pos in clerk_errors:
+                logger.error(f"Error processing row {idx}: {clerk_errors[pos]}")
+                errors.append({"row": idx, "error": clerk_errors[pos]})
+                continue
+            record["id"] = user_id
+            records.append(record)
+
+        # Inserción masiva en una sola transacción
+        created = import_service.import_employees(client_id, records)
         return jsonify({
             "message": "Employee upload completed",
             "created_count": len(created),
-            "created_employees": [e["employee"].to_dict() for e in created],
+            "created_employees": [Employee(**mapping).to_dict() for mapping in created],
             "errors": errors
         }), 200
 
     except Exception as e:
         db.session.rollback()
         logger.critical("Error uploading employees", exc_info=e)
-        for clerk_id in created_employees:
-            print(f"Attempting to delete Clerk user {clerk_id}")
-            try:
-                CLERK_CLIENT.users.delete(clerk_id)
-                logger.warning(f"Rolled back Clerk user: {clerk_id}")
-            except Exception as delete_err:
-                logger.error(f"Failed to delete Clerk user {clerk_id}: {delete_err}")
+        provisioner.delete_users(created_employees)
         return jsonify({"error": "Internal Server Error"}), 500
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+from flask import request, jsonify, Blueprint, current_app, send_file
+from app.utils import logger
+from app.models import Job
+from app.services.job_service import JobService
+from app.middleware import postman_consultant_token_required
+
+job = Blueprint("job", __name__)
+
+@job.route("/", methods=["POST"])
+@postman_consultant_token_required
+def enqueue_job():
+    """
+    Enqueue a background job.
+
+    Expected JSON Body:
+        {
+            "kind": "results_export" or "assignment_excel",
+            "survey_id": "survey_id_string",
+            "client_id": "client_id_string"
+        }
+
+    Returns:
+        202 with the job representation; poll GET /job/<job_id> for its status.
+    """
+    try:
+        data = request.json
+        if not data or "kind" not in data:
+            return jsonify({"error": "Missing job kind"}), 400
+
+        job_service = JobService(current_app.mongo_db, current_app.config)
+        new_job = job_service.enqueue(data["kind"], data)
+        return jsonify({"message": "Job enqueued", "job": Job.to_dict(new_job)}), 202
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        logger.critical("Error enqueuing job", exc_info=e)
+        return jsonify({"error": "Internal Server Error"}), 500
+
+@job.route("/<job_id>", methods=["GET"])
+@postman_consultant_token_required
+def get_job(job_id):
+    try:
+        job_service = JobService(current_app.mongo_db, current_app.config)
+        job_doc = job_service.get(job_id)
+        if not job_doc:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(Job.to_dict(job_doc)), 200
+    except Exception as e:
+        logger.critical("Error getting job", exc_info=e)
+        return jsonify({"error": "Internal Server Error"}), 500
+
+@job.route("/<job_id>/download", methods=["GET"])
+@postman_consultant_token_required
+def download_job_artifact(job_id):
+    try:
+        job_service = JobService(current_app.mongo_db, current_app.config)
+        job_doc = job_service.get(job_id)
+        if not job_doc:
+            return jsonify({"error": "Job not found"}), 404
+        if job_doc.get("status") != Job.COMPLETED:
+            return jsonify({"error": f"Job is {job_doc.get('status')}", "job": Job.to_dict(job_doc)}), 409
+
+        artifact_path = job_doc.get("artifact_path")
+        if not artifact_path or not os.path.exists(artifact_path):
+            return jsonify({"error": "Job artifact is no longer available"}), 410
+
+        return send_file(
+            artifact_path,
+            mimetype=job_doc.get("mimetype"),
+            as_attachment=True,
+            download_name=job_doc.get("filename")
+        )
+    except Exception as e:
+        logger.critical("Error downloading job artifact", exc_info=e)
+        return jsonify({"error": "Internal Server Error"}), 500
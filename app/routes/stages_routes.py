@@ -2,6 +2,7 @@ from flask import request, jsonify, Blueprint, current_app
 from app.models import Stages
 from app.utils import logger
 from app.middleware import postman_consultant_token_required
+from app.services.survey_service import invalidate_question_mappings
 import app
 
 stage = Blueprint("stage", __name__)
@@ -30,6 +31,7 @@ def create_stage():
             collection=stages
         )
         stage.insert_stage()
+        invalidate_question_mappings(db)
 
         return jsonify({"message": "Created new stage!", "data": stage.to_dict()}), 201
 
@@ -102,6 +104,7 @@ def update_stage(id):
         stage = Stages(collection=stages)
         
         modified_count = stage.update(id, update_data)
+        invalidate_question_mappings(db)
         
         if modified_count == 0:
             return jsonify({"message": "No data updated. Stage may not exist."}), 404
@@ -123,6 +126,7 @@ def delete_stage(id):
         stage = Stages(collection=stages)
 
         deleted_count = stage.delete_one(id)
+        invalidate_question_mappings(db)
 
         if deleted_count == 0:
             return jsonify({"message": "No data deleted. Stage may not exist."}), 404
@@ -1,15 +1,33 @@
 from flask import request, jsonify, Blueprint, current_app, g
 from app.utils import logger
 from app.services import db
-from app.models import EmployeeSurveyAssignment
+from app.models import EmployeeSurveyAssignment, Survey, Job
 from app.services.assignment_service import AssignmentService
 from app.services.survey_service import SurveyService
+from app.services.survey_renderer import invalidate_survey_template
+from app.services.job_service import JobService, async_requested
 from app.middleware import token_required, postman_consultant_token_required
+from app.ml.batch import run_batch
+from bson.objectid import ObjectId
+import click
 import pandas as pd
 from io import BytesIO
+from datetime import datetime
 
 survey = Blueprint("survey", __name__)
 
+
+def _survey_query(id):
+    """
+    Builds the query matching a survey document by its _id.
+    Surveys are usually stored with a string _id; ids that look like an ObjectId
+    also match documents stored with ObjectId keys.
+    """
+    if ObjectId.is_valid(str(id)):
+        return {"_id": {"$in": [id, ObjectId(id)]}}
+    return {"_id": id}
+
+
 @survey.route("/", methods=["POST"])
 def create_survey():
     """
@@ -52,6 +70,8 @@ def generate_assignment_excel(survey_id, client_id):
 
     Query Parameters:
         client_id (str): ID of the client for which to fetch employees.
+        async (bool): When "true", the sheet is generated by a background job and a
+            202 response with the job is returned (see /job/<job_id>).
 
     Returns:
         An Excel file (as a downloadable attachment) containing:
@@ -67,6 +87,12 @@ def generate_assignment_excel(survey_id, client_id):
         if not client_id:
             return jsonify({"error": "Client ID is required"}), 400
         
+        if async_requested(request.args):
+            new_job = JobService(current_app.mongo_db, current_app.config).enqueue(
+                "assignment_excel", {"survey_id": survey_id, "client_id": client_id}
+            )
+            return jsonify({"message": "Job enqueued", "job": Job.to_dict(new_job)}), 202
+
         assignment_service = AssignmentService(db)
         excel_file = assignment_service.generate_assignment_excel(survey_id, client_id)
         return current_app.response_class(
@@ -90,8 +116,16 @@ def finalize_assignment():
         Multipart/form-data with a file attached under the key "file".
         The uploaded Excel file should have columns matching those generated by the GET /assign/<survey_id> endpoint.
 
+    Query Parameters:
+        mode (str): "insert" (default) only adds assignments that do not exist yet, so
+            re-uploading a sheet is idempotent. "sync" also deletes the existing assignments
+            of the sheet's surveys that are no longer in the sheet, unless some row of the
+            sheet could not be imported (then only the inserts are applied).
+
     Returns:
-        JSON response with a success message and a list of finalized assignment records.
+        JSON response with a success message, the created assignment records, the
+        number of skipped (already existing) and deleted assignments, the per-row
+        errors of the rows that were not imported and whether the sync deletes were skipped.
     """
     try:
         if "file" not in request.files:
@@ -103,9 +137,19 @@ def finalize_assignment():
         # Read the uploaded Excel file into a DataFrame.
         df = pd.read_excel(file)
         print(df)
+        mode = request.args.get("mode", "insert")
+        if mode not in AssignmentService.IMPORT_MODES:
+            return jsonify({"error": f"Unsupported mode '{mode}'"}), 400
         assignment_service = AssignmentService(db)
-        assignments = assignment_service.finalize_assignment(df)
-        return jsonify({"message": "Survey assignments finalized", "assignments": assignments}), 200
+        result = assignment_service.finalize_assignment(df, mode=mode)
+        return jsonify({
+            "message": "Survey assignments finalized",
+            "assignments": result["assignments"],
+            "skipped": result["skipped"],
+            "deleted": result["deleted"],
+            "errors": result["errors"],
+            "sync_skipped": result["sync_skipped"]
+        }), 200
     except Exception as e:
         current_app.logger.critical("Error finalizing assignments", exc_info=e)
         db.session.rollback()
@@ -164,7 +208,17 @@ def update_survey(id):
             return jsonify({"error": "Database not initialized"}), 500
 
         surveys_collection = db_mongo.get_collection("Surveys")
-        result = surveys_collection.update_one({"id": id}, {"$set": update_data})
+
+        # Keep the precomputed question index in sync with the question tree
+        if "questions" in update_data or "questionBlocks" in update_data:
+            current_doc = surveys_collection.find_one(
+                _survey_query(id), {"questionBlocks.questions": 1, "questions.questions": 1}
+            ) or {}
+            update_data.update(Survey.question_index({**current_doc, **update_data}))
+
+        update_data["updated_at"] = datetime.utcnow()
+        result = surveys_collection.update_one(_survey_query(id), {"$set": update_data})
+        invalidate_survey_template(id)
         if result.modified_count == 0:
             return jsonify({"message": "No data updated. Survey may not exist."}), 404
 
@@ -190,7 +244,8 @@ def delete_survey(id):
             return jsonify({"error": "Database not initialized"}), 500
 
         surveys_collection = db_mongo.get_collection("Surveys")
-        result = surveys_collection.delete_one({"id": id})
+        result = surveys_collection.delete_one(_survey_query(id))
+        invalidate_survey_template(id)
         if result.deleted_count == 0:
             return jsonify({"message": "No data deleted. Survey may not exist."}), 404
 
@@ -198,3 +253,43 @@ def delete_survey(id):
     except Exception as e:
         logger.critical("Error deleting survey", exc_info=e)
         return jsonify({"error": "Internal Server Error"}), 500
+
+
+@survey.cli.command("backfill-question-ids")
+def backfill_question_ids():
+    """
+    One-shot backfill of "question_ids" and "question_count" on existing surveys.
+
+    Usage:
+        flask --app main survey backfill-question-ids
+    """
+    surveys_collection = current_app.mongo_db.get_collection("Surveys")
+    updated = Survey.backfill_question_index(surveys_collection)
+    logger.info(f"Backfilled question index on {updated} surveys")
+
+
+@survey.cli.command("assign-batch")
+@click.argument("client_ids", nargs=-1, required=True)
+@click.option("--cores", type=int, default=None, help="Core budget (defaults to SUGGESTION_BATCH_CORES).")
+def assign_batch(client_ids, cores):
+    """
+    Precomputes 360 suggestions for many clients in parallel, warming the suggestion
+    cache used by /survey/assign, and prints the per-client timing.
+
+    Usage:
+        flask --app main survey assign-batch <client_id> [<client_id> ...] --cores 8
+    """
+    results = run_batch(
+        client_ids,
+        current_app.config["SQLALCHEMY_DATABASE_URI"],
+        engine_options=current_app.config.get("SQLALCHEMY_ENGINE_OPTIONS"),
+        cores=cores or current_app.config["SUGGESTION_BATCH_CORES"]
+    )
+    for r in results:
+        if "error" in r:
+            click.echo(f"{r['tenant_id']}: ERROR {r['error']}")
+        else:
+            click.echo(
+                f"{r['tenant_id']}: {r['employees']} employees, {r['suggestions']} suggestions, "
+                f"{r['seconds']}s (fetch {r['fetch_seconds']}s, engine {r['engine_seconds']}s)"
+            )
@@ -1,11 +1,22 @@
 from io import BytesIO
 import pandas as pd
 from flask import current_app
+from sqlalchemy import select, insert, delete
 from app.models import Product, Employee, EmployeeSurveyAssignment
 from app.utils import logger
+from app.utils.upload_normalization import normalize_frame, missing_columns
 from app.ml import SuggestionEngine
 
 class AssignmentService:
+    # Employee columns needed to build the assignment sheet (and the suggestion graph)
+    ASSIGNMENT_COLUMNS = Employee.GRAPH_COLUMNS + ("first_name", "last_name_paternal", "last_name_maternal")
+
+    # Columns read back from an uploaded assignment sheet (see generate_assignment_excel)
+    UPLOAD_COLUMNS = ("ID EVALUADOR", "ID EVALUADO", "TIPO USUARIO", "survey_id", "survey_type")
+    UPLOAD_REQUIRED = ("ID EVALUADOR", "ID EVALUADO", "survey_id", "survey_type")
+    INSERT_CHUNK_SIZE = 1000
+    IMPORT_MODES = ("insert", "sync")
+
     def __init__(self, db):
         self.db = db
 
@@ -32,13 +43,14 @@ class AssignmentService:
             raise ValueError("Survey not found")
 
         survey_type = self.determine_survey_type(survey_doc)
-        employees = self.db.session.query(Employee).filter_by(client_id=client_id).all()
+        # Una sola consulta por columnas: la comparten la hoja y el motor de sugerencias
+        employees = Employee.load_columns(client_id, self.ASSIGNMENT_COLUMNS, self.db.session)
         if not employees:
             raise ValueError("No employees found for the client")
 
         suggestions_map = {}
         if survey_type == "360":
-            engine = SuggestionEngine(self.db, client_id)
+            engine = SuggestionEngine(self.db, client_id, employees=employees)
             suggestions_map = engine.assign_suggestions()
 
         employees_dict = {e.employee_number: e for e in employees}
@@ -70,40 +82,145 @@ class AssignmentService:
         logger.info(f"Generated assignment Excel with {len(rows)} rows for survey {survey_id}")
         return output
 
-    def finalize_assignment(self, df):
-        assignments = []
-
-        for idx, row in df.iterrows():
+    def finalize_assignment(self, df, mode: str = "insert"):
+        """
+        Imports an uploaded assignment sheet idempotently.
+
+        :param mode: "insert" adds the sheet's assignments that do not exist yet;
+                     "sync" also deletes the existing assignments of the sheet's surveys
+                     that are no longer in the sheet. The deletes are skipped when any row
+                     of the sheet could not be imported, since a dropped row would
+                     otherwise delete a valid assignment.
+        :return: Dict with the created "assignments", the "skipped" rows that already
+                 existed, the number of "deleted" assignments, the per-row "errors"
+                 ({"row", "error"}) of the rows that were not imported and whether the
+                 sync deletes were skipped ("sync_skipped").
+        """
+        if mode not in self.IMPORT_MODES:
+            raise ValueError(f"Unsupported import mode: {mode}")
+        result = {"assignments": [], "skipped": 0, "deleted": 0, "errors": [], "sync_skipped": False}
+
+        missing = missing_columns(df, self.UPLOAD_REQUIRED)
+        if missing:
+            logger.error(f"Missing data in every row, columns not found: {missing}")
+            return result
+
+        records, errors = normalize_frame(
+            df,
+            column_map={c: c for c in self.UPLOAD_COLUMNS if c in df.columns},
+            required=self.UPLOAD_REQUIRED,
+            int_columns=("ID EVALUADOR", "ID EVALUADO")
+        )
+        for error in errors:
+            logger.error(f"Missing data in row {error['row']}: {error['error']}")
+        result["errors"].extend(errors)
+
+        def row_error(idx, message):
+            logger.error(f"{message} in row {idx}")
+            result["errors"].append({"row": idx, "error": message})
+
+        # Resolución por conjuntos: una consulta a Mongo por los clientes de las encuestas
+        # y una sola consulta IN de empleados, acotada a esos clientes
+        survey_ids = list({str(row["survey_id"]) for _, row in records})
+        survey_clients = {
+            doc["_id"]: doc.get("client_id")
+            for doc in current_app.mongo_db.get_collection("Surveys").find(
+                {"_id": {"$in": survey_ids}}, {"client_id": 1}
+            )
+        }
+        numbers = {row[c] for _, row in records for c in ("ID EVALUADOR", "ID EVALUADO")}
+        client_ids = {c for c in survey_clients.values() if c}
+        employee_ids = {}
+        if numbers and client_ids:
+            rows = self.db.session.execute(
+                select(Employee.id, Employee.employee_number, Employee.client_id)
+                .where(Employee.client_id.in_(client_ids), Employee.employee_number.in_(numbers))
+            ).all()
+            employee_ids = {(r.client_id, r.employee_number): r.id for r in rows}
+
+        pending = []
+        for idx, row in records:
             try:
-                evaluator_num = row.get("ID EVALUADOR")
-                evaluated_num = row.get("ID EVALUADO")
-                relation = row.get("TIPO USUARIO")
-                survey_id = row.get("survey_id")
-                survey_type = row.get("survey_type")
-
-                if not all([evaluator_num, evaluated_num, survey_id]):
-                    logger.error(f"Missing data in row {idx}")
+                survey_id = str(row["survey_id"])
+                if survey_id not in survey_clients:
+                    row_error(idx, f"Survey {survey_id} not found")
                     continue
+                client_id = survey_clients[survey_id]
+                evaluator_id = employee_ids.get((client_id, row["ID EVALUADOR"]))
+                evaluated_id = employee_ids.get((client_id, row["ID EVALUADO"]))
 
-                evaluator = self.db.session.query(Employee).filter_by(employee_number=evaluator_num).first()
-                evaluated = self.db.session.query(Employee).filter_by(employee_number=evaluated_num).first()
-
-                if not evaluator or not evaluated:
-                    logger.error(f"Evaluator or evaluated not found in row {idx}")
+                if not evaluator_id or not evaluated_id:
+                    row_error(idx, "Evaluator or evaluated not found")
                     continue
 
-                assignment_data = {
-                    "employee_id": evaluator.id,
+                pending.append({
+                    "employee_id": evaluator_id,
                     "survey_id": survey_id,
-                    "survey_type": survey_type,
-                    "target_employee_id": evaluated.id,
-                    "target_type": relation
-                }
-                assignment = EmployeeSurveyAssignment.create_assignment(assignment_data)
-                assignments.append(assignment.to_dict())
-
+                    "survey_type": str(row["survey_type"]).strip(),
+                    "target_employee_id": evaluated_id,
+                    "target_type": EmployeeSurveyAssignment.normalize_target_type(row.get("TIPO USUARIO"))
+                })
             except Exception as inner_e:
-                logger.error(f"Error processing row {idx}: {inner_e}")
+                row_error(idx, f"Error processing row: {inner_e}")
+
+        # Diferencia contra las asignaciones existentes de las encuestas de la hoja
+        existing = {}
+        if survey_clients:
+            for r in self.db.session.execute(
+                    select(EmployeeSurveyAssignment.id,
+                           *[getattr(EmployeeSurveyAssignment, f) for f in EmployeeSurveyAssignment.KEY_FIELDS])
+                    .where(EmployeeSurveyAssignment.survey_id.in_(list(survey_clients)))):
+                existing[EmployeeSurveyAssignment.key_of(r._mapping)] = r.id
+
+        sheet_keys = set()
+        to_insert = []
+        for assignment in pending:
+            key = EmployeeSurveyAssignment.key_of(assignment)
+            if key in existing or key in sheet_keys:
+                result["skipped"] += 1
+            else:
+                to_insert.append(assignment)
+            sheet_keys.add(key)
+
+        if mode == "sync" and result["errors"]:
+            logger.warning(
+                f"Sync deletes skipped: {len(result['errors'])} rows of the sheet could not be imported"
+            )
+            result["sync_skipped"] = True
+        elif mode == "sync":
+            stale_ids = [assignment_id for key, assignment_id in existing.items() if key not in sheet_keys]
+            for start in range(0, len(stale_ids), self.INSERT_CHUNK_SIZE):
+                chunk = stale_ids[start:start + self.INSERT_CHUNK_SIZE]
+                self.db.session.execute(
+                    delete(EmployeeSurveyAssignment).where(EmployeeSurveyAssignment.id.in_(chunk))
+                )
+            result["deleted"] = len(stale_ids)
+
+        # Inserción masiva en bloques (un INSERT multi-fila por bloque) y un solo commit
+        for start in range(0, len(to_insert), self.INSERT_CHUNK_SIZE):
+            self.db.session.execute(
+                insert(EmployeeSurveyAssignment), to_insert[start:start + self.INSERT_CHUNK_SIZE]
+            )
+
+        # Ids autoincrementales de las nuevas filas, leídos de una vez por su clave
+        if to_insert:
+            inserted_keys = {EmployeeSurveyAssignment.key_of(a) for a in to_insert}
+            new_ids = {}
+            for r in self.db.session.execute(
+                    select(EmployeeSurveyAssignment.id,
+                           *[getattr(EmployeeSurveyAssignment, f) for f in EmployeeSurveyAssignment.KEY_FIELDS])
+                    .where(EmployeeSurveyAssignment.survey_id.in_({a["survey_id"] for a in to_insert}))):
+                key = EmployeeSurveyAssignment.key_of(r._mapping)
+                if key in inserted_keys:
+                    new_ids[key] = r.id
+            result["assignments"] = [
+                {"id": new_ids.get(EmployeeSurveyAssignment.key_of(a)), **a}
+                for a in to_insert
+            ]
 
         self.db.session.commit()
-        return assignments
\ No newline at end of file
+        logger.info(
+            f"Finalized assignments from {len(records)} rows ({mode}): {len(result['assignments'])} created, "
+            f"{result['skipped']} already existed, {result['deleted']} deleted"
+        )
+        return result
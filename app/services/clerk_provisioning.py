@@ -0,0 +1,139 @@
+import time
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.utils import logger
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills `rate` tokens per second up to `capacity`
+    and blocks callers of acquire() until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+def rate_limit_delay(error):
+    """
+    Returns the seconds to wait before retrying when `error` is a 429 response from
+    Clerk (honouring Retry-After, 0 when absent), or None for any other error.
+    """
+    raw_response = getattr(error, "raw_response", None)
+    status_code = getattr(error, "status_code", None) or getattr(raw_response, "status_code", None)
+    if status_code != 429:
+        return None
+    headers = getattr(raw_response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ClerkProvisioner:
+    """
+    Creates Clerk users for bulk uploads.
+
+    Requests run on a bounded thread pool and go through a token bucket matching
+    Clerk's rate limit; 429 responses are retried with exponential backoff. The
+    client is injectable (anything exposing users.create / users.delete), so the
+    pipeline can run against a local stub (see tests/conftest.py).
+    """
+
+    def __init__(self, client, rate_per_second: float, max_workers: int = 4, max_retries: int = 5,
+                 backoff: float = 0.5, progress_every: int = 100, clock=time.monotonic, sleep=time.sleep):
+        self.client = client
+        self.bucket = TokenBucket(rate_per_second, clock=clock, sleep=sleep)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.progress_every = progress_every
+        self.sleep = sleep
+
+    def _call(self, fn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = rate_limit_delay(e)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                delay = max(delay, self.backoff * 2 ** attempt)
+                logger.warning(f"Clerk rate limit hit, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                self.sleep(delay)
+
+    def _create_user(self, email):
+        user = self._call(self.client.users.create, request={
+            "email_address": [email],
+            "public_metadata": {"user_type": "employee"}
+        })
+        if not user:
+            raise ValueError("Failed to create Clerk user")
+        return user.id
+
+    def _run(self, fn, items, label):
+        """
+        Applies `fn` to every item on the pool, logging progress.
+
+        :return: Tuple (results, errors) where results[i] is fn(items[i]) or None
+                 and errors maps failed positions to their error message.
+        """
+        results = [None] * len(items)
+        errors = {}
+        if not items:
+            return results, errors
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(fn, item): i for i, item in enumerate(items)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    errors[i] = str(e)
+                done += 1
+                if done % self.progress_every == 0 or done == len(items):
+                    logger.info(f"{label}: {done}/{len(items)} done, {len(errors)} failed")
+        return results, errors
+
+    def create_users(self, emails):
+        """
+        Creates one Clerk user per email.
+
+        :return: Tuple (user_ids, errors): user_ids[i] is the Clerk id created for
+                 emails[i] (None on failure) and errors maps failed positions to messages.
+        """
+        return self._run(self._create_user, list(emails), "Clerk provisioning")
+
+    def delete_users(self, user_ids):
+        """
+        Rolls back created Clerk users, logging (not raising) individual failures.
+        """
+        user_ids = list(user_ids)
+        _, errors = self._run(lambda user_id: self._call(self.client.users.delete, user_id),
+                              user_ids, "Clerk rollback")
+        for i, error in errors.items():
+            logger.error(f"Failed to delete Clerk user {user_ids[i]}: {error}")
+        for i, user_id in enumerate(user_ids):
+            if i not in errors:
+                logger.warning(f"Rolled back Clerk user: {user_id}")
+
@@ -0,0 +1,92 @@
+from sqlalchemy import insert, update
+from app.models import Employee
+from app.utils import logger
+from app.utils.upload_normalization import normalize_frame
+
+
+class EmployeeImportService:
+    """
+    Bulk import of employee records for upload_employees.
+
+    The whole sheet is validated and normalised in memory first. Valid records are then inserted in
+    chunks inside a single transaction: employees are inserted without supervisors
+    (a supervisor may be in a later chunk) and their supervisor ids are set afterwards
+    with one bulk UPDATE by primary key, resolved through the sheet's employee_number map.
+    """
+
+    REQUIRED_FIELDS = (
+        "employee_number", "first_name", "last_name_paternal", "employee_type", "birth_date",
+        "sex", "region", "city", "herichary_level", "position", "area", "department",
+        "hire_date", "email", "floor"
+    )
+    DATE_FIELDS = ("birth_date", "hire_date")
+    # sheet supervisor number -> Employee column
+    SUPERVISOR_FIELDS = {
+        "direct_supervisor_number": "direct_supervisor_id",
+        "functional_supervisor_number": "functional_supervisor_id",
+    }
+
+    def __init__(self, db, chunk_size: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def normalize(self, df, column_map):
+        """
+        Validates and normalises the whole sheet in memory (see normalize_frame):
+        required fields, dates, employee numbers and duplicated numbers.
+
+        :param column_map: Sheet column -> Employee field (supervisor columns map to
+                           "direct_supervisor_number" / "functional_supervisor_number").
+        :return: Tuple (valid, errors) with the (row, record) tuples of valid rows and
+                 the {"row", "error"} of rejected rows.
+        """
+        return normalize_frame(
+            df,
+            column_map=column_map,
+            required=self.REQUIRED_FIELDS,
+            id_columns=tuple(self.SUPERVISOR_FIELDS),
+            int_columns=("employee_number",),
+            date_columns=self.DATE_FIELDS,
+            unique_columns=("employee_number",)
+        )
+
+    def _chunks(self, items):
+        for start in range(0, len(items), self.chunk_size):
+            yield items[start:start + self.chunk_size]
+
+    def import_employees(self, client_id, records):
+        """
+        Inserts validated records (each with its Clerk "id") in one transaction.
+
+        :return: The inserted employee mappings, including their resolved supervisor ids.
+        :raises Exception: Any database error, after rolling the transaction back.
+        """
+        number_to_id = {str(r["employee_number"]): r["id"] for r in records}
+        mappings = []
+        supervisor_updates = []
+        for record in records:
+            mapping = {k: v for k, v in record.items() if k not in self.SUPERVISOR_FIELDS}
+            mapping["client_id"] = client_id
+            mappings.append(mapping)
+
+            supervisors = {}
+            for field, column in self.SUPERVISOR_FIELDS.items():
+                number = record.get(field)
+                if number and number in number_to_id:
+                    supervisors[column] = number_to_id[number]
+            if supervisors:
+                supervisor_updates.append({"id": mapping["id"], **supervisors})
+
+        try:
+            for chunk in self._chunks(mappings):
+                self.db.session.execute(insert(Employee), chunk)
+            for chunk in self._chunks(supervisor_updates):
+                self.db.session.execute(update(Employee), chunk)
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+        supervisors_by_id = {u["id"]: u for u in supervisor_updates}
+        logger.info(f"Imported {len(mappings)} employees for client {client_id}")
+        return [{**m, **supervisors_by_id.get(m["id"], {})} for m in mappings]
@@ -0,0 +1,248 @@
+import os
+import shutil
+import socket
+import time
+import multiprocessing
+from threading import Lock, Thread
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.services import db
+from app.services.survey_service import SurveyService
+from app.services.assignment_service import AssignmentService
+from app.models.job import Job
+from app.utils import logger
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _results_export(mongo_db, params):
+    return SurveyService(mongo_db=mongo_db, db=db).get_excel(params["survey_id"], params["client_id"])
+
+
+def _assignment_excel(mongo_db, params):
+    return AssignmentService(db).generate_assignment_excel(params["survey_id"], params["client_id"])
+
+
+# kind -> (handler returning a binary file object, artifact filename template)
+JOB_HANDLERS = {
+    "results_export": (_results_export, "results_{survey_id}.xlsx"),
+    "assignment_excel": (_assignment_excel, "organization_chart_{survey_id}.xlsx"),
+}
+REQUIRED_PARAMS = ("survey_id", "client_id")
+
+_executor = None
+_executor_lock = Lock()
+
+# Periodic purge thread of this web worker (see JobService._start_purger)
+_purger = None
+_purger_lock = Lock()
+
+# Flask app of the current pool process (see _init_worker)
+_worker_app = None
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _init_worker():
+    """
+    Runs once in every pool process. Processes are spawned rather than forked, so
+    nothing is inherited from the web worker: the minimal worker app opens this
+    process's own SQL engine and Mongo client, without re-running the web startup
+    (tables, indexes, orphaned jobs) that create_app() performs.
+    """
+    global _worker_app
+    from app import create_worker_app
+
+    _worker_app = create_worker_app()
+
+
+def _get_executor(max_workers: int, reset: bool = False):
+    """
+    Returns the process pool shared by every JobService of this web worker,
+    creating it lazily (or recreating it after a worker crash).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None or reset:
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return _executor
+
+
+def _run_job(job_id, kind, params, artifact_dir):
+    """
+    Executes a job inside a pool process and stores its artifact on disk.
+    Uses the process's own SQL and Mongo connections; job state is written to the 'Jobs' collection.
+    """
+    mongo_db = _worker_app.mongo_db
+    with _worker_app.app_context():
+        jobs = Job(mongo_db.get_collection("Jobs"))
+        try:
+            jobs.mark_running(job_id)
+            handler, filename_template = JOB_HANDLERS[kind]
+            filename = filename_template.format(**params)
+            artifact_path = os.path.join(artifact_dir, f"{job_id}_{filename}")
+
+            file_obj = handler(mongo_db, params)
+            try:
+                with open(artifact_path, "wb") as artifact:
+                    shutil.copyfileobj(file_obj, artifact)
+            finally:
+                file_obj.close()
+
+            jobs.mark_completed(job_id, artifact_path, os.path.getsize(artifact_path), filename, XLSX_MIMETYPE)
+            logger.info(f"Job {job_id} ({kind}) completed")
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            jobs.mark_failed(job_id, str(e))
+        finally:
+            db.session.remove()
+
+
+def async_requested(args):
+    """
+    True when a request asks to run its work as a background job (?async=true).
+    """
+    return str(args.get("async", "")).lower() in ("1", "true", "yes")
+
+
+class JobService:
+    """
+    Runs heavy exports (results workbooks, assignment sheets) in a local process pool.
+
+    Job state lives in the 'Jobs' collection and artifacts on local disk under
+    JOB_ARTIFACT_DIR. Every JOB_PURGE_INTERVAL_SECONDS a background thread purges
+    finished jobs older than JOB_RETENTION_SECONDS, evicts the oldest artifacts whenever
+    their total size exceeds JOB_ARTIFACT_MAX_BYTES and fails jobs lost by a restart.
+    """
+
+    def __init__(self, mongo_db, config):
+        self.jobs = Job(mongo_db.get_collection("Jobs"))
+        self.artifact_dir = config["JOB_ARTIFACT_DIR"]
+        self.retention = timedelta(seconds=config["JOB_RETENTION_SECONDS"])
+        self.max_bytes = config["JOB_ARTIFACT_MAX_BYTES"]
+        self.max_workers = config["JOB_WORKERS"]
+        self.purge_interval = config["JOB_PURGE_INTERVAL_SECONDS"]
+        self.timeout = timedelta(seconds=config["JOB_TIMEOUT_SECONDS"])
+        os.makedirs(self.artifact_dir, exist_ok=True)
+
+    def enqueue(self, kind, params):
+        """
+        Registers a job and submits it to the process pool.
+
+        :raises ValueError: If the kind is unknown or required parameters are missing.
+        :return: The created job document.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unsupported job kind: {kind}")
+        missing = [p for p in REQUIRED_PARAMS if not params.get(p)]
+        if missing:
+            raise ValueError(f"Missing job parameters: {missing}")
+        params = {p: params[p] for p in REQUIRED_PARAMS}
+
+        self._start_purger()
+        job = self.jobs.create(kind, params, owner=_owner())
+        args = (job["_id"], kind, params, self.artifact_dir)
+        try:
+            future = _get_executor(self.max_workers).submit(_run_job, *args)
+        except BrokenProcessPool:
+            logger.warning("Job process pool was broken, recreating it")
+            future = _get_executor(self.max_workers, reset=True).submit(_run_job, *args)
+        future.add_done_callback(lambda f, job_id=job["_id"]: self._on_done(job_id, f))
+        logger.info(f"Enqueued job {job['_id']} ({kind}) with {params}")
+        return job
+
+    def _on_done(self, job_id, future):
+        # Failures inside the job are recorded by the worker; this catches crashed workers.
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Job {job_id} crashed: {error}")
+            self.jobs.mark_failed(job_id, str(error))
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _remove_artifact(self, path):
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.error(f"Could not remove job artifact {path}: {e}")
+
+    def _start_purger(self):
+        """
+        Starts this web worker's periodic purge thread if it is not running yet.
+        """
+        global _purger
+        with _purger_lock:
+            if _purger is not None and _purger.is_alive():
+                return
+            _purger = Thread(target=self._purge_loop, name="job-purger", daemon=True)
+            _purger.start()
+
+    def _purge_loop(self):
+        while True:
+            time.sleep(self.purge_interval)
+            try:
+                self.reclaim_orphaned()
+                self.purge()
+            except Exception as e:
+                logger.error(f"Periodic job purge failed: {e}")
+
+    def reclaim_orphaned(self):
+        """
+        Marks as failed the queued or running jobs that can no longer finish: those whose
+        web worker on this host has exited (e.g. restarted by gunicorn) and those older
+        than JOB_TIMEOUT_SECONDS. Called at startup and by the periodic purge.
+
+        :return: Number of jobs marked failed.
+        """
+        host = socket.gethostname()
+        cutoff = datetime.utcnow() - self.timeout
+        orphaned = []
+        for job in self.jobs.unfinished():
+            owner_host, _, owner_pid = (job.get("owner") or "").rpartition(":")
+            owner_gone = owner_host == host and owner_pid.isdigit() and not _pid_alive(int(owner_pid))
+            created_at = job.get("created_at")
+            if owner_gone or (created_at is not None and created_at < cutoff):
+                orphaned.append(job["_id"])
+
+        failed = self.jobs.fail_many(orphaned, "Job was interrupted before it finished")
+        if failed:
+            logger.warning(f"Marked {failed} orphaned jobs as failed")
+        return failed
+
+    def purge(self):
+        """
+        Deletes jobs past their retention period and evicts the oldest artifacts
+        while the artifacts on disk exceed the configured size budget.
+        """
+        expired = self.jobs.finished_before(datetime.utcnow() - self.retention)
+        for job in expired:
+            self._remove_artifact(job.get("artifact_path"))
+        self.jobs.delete_many([job["_id"] for job in expired])
+
+        artifacts = self.jobs.completed_artifacts()
+        total = sum(job.get("artifact_size") or 0 for job in artifacts)
+        for job in artifacts:
+            if total <= self.max_bytes:
+                break
+            self._remove_artifact(job.get("artifact_path"))
+            self.jobs.mark_expired(job["_id"])
+            total -= job.get("artifact_size") or 0
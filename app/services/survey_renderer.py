@@ -0,0 +1,105 @@
+import os
+from app.utils.lru_cache import LRUCache
+
+# Rendered survey templates: { survey_id: (version, transformed_blocks) }
+SURVEY_TEMPLATE_CACHE = LRUCache(maxsize=int(os.getenv("SURVEY_TEMPLATE_CACHE_SIZE", "256")))
+
+
+def survey_version(survey_doc):
+    """
+    Returns the stamp that identifies the current version of a survey document.
+    update_survey sets "updated_at"; surveys never updated fall back to "created_at".
+    """
+    return survey_doc.get("updated_at") or survey_doc.get("created_at")
+
+
+def _render_options(options):
+    return [{"label": opt.get("label", ""), "value": int(opt.get("value", 0))} for opt in options]
+
+
+def render_survey_template(blocks):
+    """
+    Transforms the stored question blocks into the structure served to employees.
+
+    Question types are normalised ("selección" -> "scale", "abierta" -> "open"),
+    option values are cast to int and scale questions without their own options
+    inherit the block's scale. Every question carries an "answer": None placeholder
+    that overlay_answers() fills in per user.
+    """
+    transformed_blocks = []
+    for block in blocks:
+        block_scale_options = block.get("scaleOptions", [])
+        transformed_questions = []
+        for q in block.get("questions", []):
+            raw_type = q.get("type", "").lower()
+            if "selección" in raw_type or "seleccion" in raw_type:
+                q_type = "scale"
+            elif "abierta" in raw_type:
+                q_type = "open"
+            else:
+                q_type = "scale"
+            transformed_question = {
+                "id": q.get("id", ""),
+                "type": q_type,
+                "text": q.get("text", ""),
+                "answer": None
+            }
+            if q_type == "scale":
+                if q.get("options") is not None:
+                    transformed_question["options"] = _render_options(q.get("options", []))
+                else:
+                    transformed_question["options"] = _render_options(block_scale_options)
+            if "minLength" in q:
+                transformed_question["minLength"] = q["minLength"]
+            if "maxLength" in q:
+                transformed_question["maxLength"] = q["maxLength"]
+            transformed_questions.append(transformed_question)
+        transformed_blocks.append({
+            "title": block.get("title", ""),
+            "description": block.get("description", ""),
+            "scaleOptions": _render_options(block_scale_options) if block_scale_options else None,
+            "questions": transformed_questions
+        })
+    return transformed_blocks
+
+
+def get_survey_template(surveys_coll, survey_doc):
+    """
+    Returns the rendered template for `survey_doc`, rendering and caching it on a miss.
+
+    `survey_doc` only needs its metadata (including the version stamps); the question
+    tree is fetched from `surveys_coll` only when the cached template is missing or stale.
+    """
+    survey_id = survey_doc["_id"]
+    version = survey_version(survey_doc)
+    cached = SURVEY_TEMPLATE_CACHE.get(survey_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    tree_doc = surveys_coll.find_one({"_id": survey_id}, {"questions": 1}) or {}
+    template = render_survey_template(tree_doc.get("questions", []))
+    SURVEY_TEMPLATE_CACHE.set(survey_id, (version, template))
+    return template
+
+
+def overlay_answers(template_blocks, user_answers):
+    """
+    Merges a user's answers ({question_id: answer}) into a cached template without mutating it.
+    """
+    return [
+        {
+            **block,
+            "questions": [
+                {**question, "answer": user_answers.get(question["id"], None)}
+                for question in block["questions"]
+            ]
+        }
+        for block in template_blocks
+    ]
+
+
+def invalidate_survey_template(survey_id):
+    """
+    Drops the cached template of a survey (called when the survey is updated or deleted).
+    """
+    SURVEY_TEMPLATE_CACHE.pop(survey_id)
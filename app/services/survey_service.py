@@ -1,9 +1,62 @@
 from datetime import datetime
 from bson.objectid import ObjectId
-from app.models import Event, Product, Employee, Client, Survey, Stages
+from app.models import Event, Product, Employee, Client, Survey, Stages, SurveyResults
 from flask import current_app
 from app.utils import logger
-import pandas as pd
+from app.utils.lru_cache import LRUCache
+from app.services.survey_renderer import survey_version
+import tempfile
+from openpyxl import Workbook
+
+# Compiled question mappings per survey: { survey_id: ((survey version, stages version), question_mapping) }
+QUESTION_MAPPING_CACHE = LRUCache(maxsize=64)
+
+# Shared version stamps, so every worker process notices writes made by the others
+CACHE_VERSIONS_COLLECTION = "CacheVersions"
+STAGES_VERSION_ID = "stages"
+
+
+def _version_stamp(mongo_db, stamp_id):
+    doc = mongo_db.get_collection(CACHE_VERSIONS_COLLECTION).find_one({"_id": stamp_id})
+    return doc.get("version", 0) if doc else 0
+
+
+def _bump_version_stamp(mongo_db, stamp_id):
+    mongo_db.get_collection(CACHE_VERSIONS_COLLECTION).update_one(
+        {"_id": stamp_id}, {"$inc": {"version": 1}}, upsert=True
+    )
+
+
+def stages_version(mongo_db):
+    """
+    Returns the version stamp of the Stages collection (0 if stages were never changed).
+    """
+    return _version_stamp(mongo_db, STAGES_VERSION_ID)
+
+
+def invalidate_question_mappings(mongo_db):
+    """
+    Bumps the shared stages version stamp (called when stages change), which makes
+    every worker's cached question mappings and every results snapshot stale,
+    and drops this worker's entries.
+    """
+    _bump_version_stamp(mongo_db, STAGES_VERSION_ID)
+    QUESTION_MAPPING_CACHE.clear()
+
+
+def employee_names_version(mongo_db, client_id):
+    """
+    Returns the version stamp of a client's employee names (0 if they were never changed).
+    """
+    return _version_stamp(mongo_db, f"employees:{client_id}")
+
+
+def invalidate_employee_names(mongo_db, client_id):
+    """
+    Bumps the employee names stamp of a client (called when an employee is renamed or
+    deleted), so the results snapshots of the client's surveys are rebuilt on next read.
+    """
+    _bump_version_stamp(mongo_db, f"employees:{client_id}")
 
 
 class SurveyService:
@@ -13,6 +66,25 @@ class SurveyService:
         "scale_ids", "stage_ids", "survey_type"  # survey_type determines the rules.
     ]
 
+    # Column layout of the results export
+    RESULT_COLUMNS = [
+        "RFC CLIENTE",
+        "CLIENTE",
+        "ID EVENTO",
+        "ID EMPLEADO EVALUADO",
+        "NOMBRE",
+        "ID COMPETENCIA",
+        "NOMBRE COMPETENCIA",
+        "ID REACTIVO",
+        "NOMBRE REACTIVO",
+        "TIPO USUARIO"
+    ]
+    CLOSED_COLUMNS = RESULT_COLUMNS + ["PONDERACIÓN DE LA RESPUESTA"]
+    OPEN_COLUMNS = RESULT_COLUMNS + ["TEXTO LIBRE"]
+
+    # Answer documents fetched per round trip when exporting results
+    RESULTS_BATCH_SIZE = 500
+
     def __init__(self, mongo_db, db):
         self.mongo_db = mongo_db
         self.db = db
@@ -116,190 +188,572 @@ class SurveyService:
         logger.info(f"Survey inserted with _id={inserted_id}")
         return survey_obj._id
 
-    def get_results(self, survey_id: str, client_id: str):
-        try:
-            closed_list = []
-            open_list = []
+    def _completed_answers_cursor(self, survey_id: str):
+        """
+        Returns a batched cursor over the completed SurveyAnswers documents of a survey,
+        or None when the survey has no completed answers yet.
+        """
+        answers_coll = self.mongo_db.get_collection("SurveyAnswers")
+        query = {"survey_id": survey_id, "status": "completed"}
+        if not answers_coll.find_one(query, {"_id": 1}):
+            return None
+        return answers_coll.find(query).batch_size(self.RESULTS_BATCH_SIZE)
 
-            # Get collections
-            surveys_coll = self.mongo_db.get_collection("Surveys")
-            stages_coll = self.mongo_db.get_collection("Stages")
+    def _results_context(self, survey_doc, client_id: str, evaluated_ids=None):
+        """
+        Loads everything needed to flatten answer documents into result rows:
+        client info, evaluated employee names and the question mapping.
 
-            # Try both collections in case of inconsistency
-            answers_coll = self.mongo_db.get_collection("SurveyAnswers")
-            answers_docs = list(answers_coll.find({"survey_id": survey_id, "status": "completed"}))
-            if not answers_docs:
-                logger.warning("No completed documents found in SurveyAnswers, trying Answers...")
-                answers_coll = self.mongo_db.get_collection("Answers")
-                answers_docs = list(answers_coll.find({"survey_id": survey_id, "status": "completed"}))
-
-            if not answers_docs:
-                logger.warning("No completed documents found with status. Retrying without status filter...")
-                answers_docs = list(answers_coll.find({"survey_id": survey_id}))
-
-            logger.info(f"Found {len(answers_docs)} answers for survey {survey_id}")
-
-            if not answers_docs:
-                logger.error("No answer documents found even after fallback.")
-                return closed_list, open_list
-
-            # Sample doc debug
-            logger.debug(f"Sample answer: {answers_docs[0]}")
-
-            # Retrieve client info
-            client = self.db.session.query(Client).filter_by(id=client_id)
-            if not client:
-                raise Exception("Client not found")
-            # Retrieve employee info
-            employees = self.db.session.query(Employee).filter_by(client_id=client_id).all()
-            if not employees:
-                raise Exception("No employees found for the client")
-
-            employee_dict = {
-                emp.id: f"{emp.first_name} {emp.last_name_paternal} {emp.last_name_maternal}" for emp in employees
-            }
+        :param survey_doc: Survey document with at least stage_ids and its version stamps.
+        :param evaluated_ids: When given, only these employees' names are loaded
+            (used by incremental snapshot refreshes).
+        """
+        # Retrieve client info
+        client = self.db.session.query(Client).filter_by(id=client_id).first()
+        if not client:
+            raise Exception("Client not found")
+        # Retrieve employee names only
+        query = (self.db.session.query(Employee.id, Employee.first_name,
+                                       Employee.last_name_paternal, Employee.last_name_maternal)
+                 .filter_by(client_id=client_id))
+        if evaluated_ids is not None:
+            query = query.filter(Employee.id.in_(evaluated_ids))
+        employees = query.all()
+        if not employees and evaluated_ids is None:
+            raise Exception("No employees found for the client")
+
+        employee_dict = {
+            emp.id: f"{emp.first_name} {emp.last_name_paternal} {emp.last_name_maternal}" for emp in employees
+        }
+
+        event_id = 1  # Placeholder or real call to Event().get_event(survey_id)
+
+        question_mapping = self.get_question_mapping(survey_doc)
+
+        return {
+            "client_rfc": client.company_rfc,
+            "client_name": client.company_name,
+            "event_id": event_id,
+            "employee_dict": employee_dict,
+            "question_mapping": question_mapping
+        }
+
+    def get_question_mapping(self, survey_doc):
+        """
+        Returns { question_id: {competence_id, competence_name, reactive_id, reactive_name} }
+        for the test items referenced by the survey's stage_ids.
 
-            # Get survey info
-            survey_doc = surveys_coll.find_one({"_id": survey_id})
-            if not survey_doc:
-                raise Exception("Survey not found")
-            event_id = 1  # Placeholder or real call to Event().get_event(survey_id)
-
-            # Build question mapping from all stages
-            question_mapping = {}
-            all_stages = stages_coll.find({})
-            for stage_doc in all_stages:
-                for test_item in stage_doc.get("test_item", []):
-                    competence_id = test_item.get("id", "")
-                    competence_name = test_item.get("name", "")
-                    for question in test_item.get("questions", []):
-                        q_id = question.get("id", "")
-                        question_mapping[q_id] = {
-                            "competence_id": competence_id,
-                            "competence_name": competence_name,
-                            "reactive_id": q_id,
-                            "reactive_name": question.get("text", "")
-                        }
-
-            logger.info(f"Total questions indexed: {len(question_mapping)}")
-
-            # Process answers
-            for doc in answers_docs:
-                evaluated_id = doc.get("target_employee_id")
-                evaluated_name = employee_dict.get(evaluated_id, "Unknown")
-                target_type = doc.get("target_type", "employee")
-
-                for ans in doc.get("answers", []):
-                    question_id = ans.get("question_id")
-                    raw_ans = ans.get("answer")
-
-                    details = question_mapping.get(question_id)
-                    if not details:
-                        logger.warning(f"Question ID {question_id} not found in mapping.")
-                        details = {
-                            "competence_id": "N/A",
-                            "competence_name": "N/A",
-                            "reactive_id": question_id,
-                            "reactive_name": "N/A"
-                        }
-
-                    row_common = {
-                        "RFC CLIENTE": client.company_rfc,
-                        "CLIENTE": client.company_name,
-                        "ID EVENTO": event_id,
-                        "ID EMPLEADO EVALUADO": evaluated_id,
-                        "NOMBRE": evaluated_name,
-                        "ID COMPETENCIA": details["competence_id"],
-                        "NOMBRE COMPETENCIA": details["competence_name"],
-                        "ID REACTIVO": details["reactive_id"],
-                        "NOMBRE REACTIVO": details["reactive_name"],
-                        "TIPO USUARIO": target_type
+        Only the referenced stages are fetched (with a projection), and the compiled
+        mapping is cached per survey version and stages version so repeated exports
+        skip the Stages scan. Surveys without stage_ids fall back to indexing every stage.
+        """
+        survey_id = survey_doc["_id"]
+        version = (survey_version(survey_doc), stages_version(self.mongo_db))
+        cached = QUESTION_MAPPING_CACHE.get(survey_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        stages_coll = self.mongo_db.get_collection("Stages")
+        stage_ids = survey_doc.get("stage_ids") or []
+        projection = {
+            "test_item.id": 1,
+            "test_item.name": 1,
+            "test_item.questions.id": 1,
+            "test_item.questions.text": 1
+        }
+        if stage_ids:
+            stages = stages_coll.find({"test_item.id": {"$in": stage_ids}}, projection)
+        else:
+            stages = stages_coll.find({}, projection)
+
+        wanted = set(stage_ids)
+        question_mapping = {}
+        for stage_doc in stages:
+            for test_item in stage_doc.get("test_item", []):
+                competence_id = test_item.get("id", "")
+                if wanted and competence_id not in wanted:
+                    continue
+                competence_name = test_item.get("name", "")
+                for question in test_item.get("questions", []):
+                    q_id = question.get("id", "")
+                    question_mapping[q_id] = {
+                        "competence_id": competence_id,
+                        "competence_name": competence_name,
+                        "reactive_id": q_id,
+                        "reactive_name": question.get("text", "")
                     }
 
-                    try:
-                        if isinstance(raw_ans, dict) and "$numberInt" in raw_ans:
-                            value = int(raw_ans["$numberInt"])
-                        else:
-                            value = int(raw_ans)
-                        row_common["PONDERACIÓN DE LA RESPUESTA"] = value
-                        closed_list.append(row_common)
-                    except Exception:
-                        open_list.append({
-                            "RFC CLIENTE": client.company_rfc,
-                            "CLIENTE": client.company_name,
-                            "ID EVENTO": event_id,
-                            "ID EMPLEADO EVALUADO": evaluated_id,
-                            "NOMBRE": evaluated_name,
-                            "ID COMPETENCIA": details["competence_id"],
-                            "NOMBRE COMPETENCIA": details["competence_name"],
-                            "ID REACTIVO": details["reactive_id"],
-                            "NOMBRE REACTIVO": details["reactive_name"],
-                            "TIPO USUARIO": target_type,
-                            "TEXTO LIBRE": raw_ans
-                        })
-
-
-            return closed_list, open_list
+        logger.info(f"Total questions indexed for survey {survey_id}: {len(question_mapping)}")
+        QUESTION_MAPPING_CACHE.set(survey_id, (version, question_mapping))
+        return question_mapping
+
+    @staticmethod
+    def _rows_for_doc(doc, context):
+        """
+        Flattens one answer document into (closed_rows, open_rows).
+        Answers that can be cast to int are closed answers; everything else is free text.
+        """
+        closed_rows = []
+        open_rows = []
+        evaluated_id = doc.get("target_employee_id")
+        evaluated_name = context["employee_dict"].get(evaluated_id, "Unknown")
+        target_type = doc.get("target_type", "employee")
+
+        for ans in doc.get("answers", []):
+            question_id = ans.get("question_id")
+            raw_ans = ans.get("answer")
+
+            details = context["question_mapping"].get(question_id)
+            if not details:
+                logger.warning(f"Question ID {question_id} not found in mapping.")
+                details = {
+                    "competence_id": "N/A",
+                    "competence_name": "N/A",
+                    "reactive_id": question_id,
+                    "reactive_name": "N/A"
+                }
+
+            row_common = {
+                "RFC CLIENTE": context["client_rfc"],
+                "CLIENTE": context["client_name"],
+                "ID EVENTO": context["event_id"],
+                "ID EMPLEADO EVALUADO": evaluated_id,
+                "NOMBRE": evaluated_name,
+                "ID COMPETENCIA": details["competence_id"],
+                "NOMBRE COMPETENCIA": details["competence_name"],
+                "ID REACTIVO": details["reactive_id"],
+                "NOMBRE REACTIVO": details["reactive_name"],
+                "TIPO USUARIO": target_type
+            }
+
+            try:
+                if isinstance(raw_ans, dict) and "$numberInt" in raw_ans:
+                    value = int(raw_ans["$numberInt"])
+                else:
+                    value = int(raw_ans)
+                row_common["PONDERACIÓN DE LA RESPUESTA"] = value
+                closed_rows.append(row_common)
+            except Exception:
+                row_common["TEXTO LIBRE"] = raw_ans
+                open_rows.append(row_common)
+
+        return closed_rows, open_rows
+
+    def _snapshot_for_doc(self, doc, context, survey_id: str, client_id: str):
+        """
+        Builds the SurveyResults snapshot document of one answer document.
+        """
+        closed_rows, open_rows = self._rows_for_doc(doc, context)
+        return {
+            "_id": doc["_id"],
+            "survey_id": survey_id,
+            "client_id": client_id,
+            "employee_id": doc.get("employee_id"),
+            "target_employee_id": doc.get("target_employee_id"),
+            "target_type": doc.get("target_type"),
+            "closed": closed_rows,
+            "open": open_rows,
+            "refreshed_at": datetime.utcnow()
+        }
+
+    def _results_snapshot(self):
+        return SurveyResults(self.mongo_db.get_collection("SurveyResults"))
+
+    def _snapshot_version(self, survey_doc, client_id: str):
+        """
+        Returns the stamps a results snapshot depends on: the survey version, the
+        stages version (competence and question names) and the client's employee names.
+        """
+        return {
+            "survey": survey_version(survey_doc),
+            "stages": stages_version(self.mongo_db),
+            "employees": employee_names_version(self.mongo_db, client_id)
+        }
+
+    def rebuild_results_snapshot(self, survey_id: str, client_id: str):
+        """
+        Recomputes the whole SurveyResults snapshot of a survey from its completed
+        answer documents and records the versions it was built from.
+
+        Returns:
+            int: Number of answer documents materialized.
+        """
+        surveys_coll = self.mongo_db.get_collection("Surveys")
+        results = self._results_snapshot()
+
+        survey_doc = surveys_coll.find_one(
+            {"_id": survey_id}, {"stage_ids": 1, "created_at": 1, "updated_at": 1}
+        )
+        if not survey_doc:
+            raise Exception("Survey not found")
+        # Read the stamps first: changes made while rebuilding leave the snapshot stale
+        version = self._snapshot_version(survey_doc, client_id)
+
+        cursor = self._completed_answers_cursor(survey_id)
+        if cursor is None:
+            logger.warning(f"No completed answer documents found for survey {survey_id}")
+            count = results.replace_survey(survey_id, [])
+        else:
+            context = self._results_context(survey_doc, client_id)
+            snapshots = (self._snapshot_for_doc(doc, context, survey_id, client_id) for doc in cursor)
+            count = results.replace_survey(survey_id, snapshots, self.RESULTS_BATCH_SIZE)
+
+        surveys_coll.update_one(
+            {"_id": survey_id},
+            {"$set": {"results_snapshot_at": datetime.utcnow(), "results_snapshot_version": version}}
+        )
+        logger.info(f"Rebuilt results snapshot of survey {survey_id} from {count} answers")
+        return count
+
+    def _snapshot_is_fresh(self, survey_doc, client_id: str):
+        """
+        True when the survey's results snapshot is built and was built from the current
+        survey, stages and employee names versions.
+        """
+        return bool(
+            survey_doc and survey_doc.get("results_snapshot_at")
+            and survey_doc.get("results_snapshot_version") == self._snapshot_version(survey_doc, client_id)
+        )
+
+    def ensure_results_snapshot(self, survey_id: str, client_id: str):
+        """
+        Builds the results snapshot of a survey if it has never been built, was
+        invalidated, or is older than the survey, its stages or its employees' names.
+        """
+        surveys_coll = self.mongo_db.get_collection("Surveys")
+        survey_doc = surveys_coll.find_one(
+            {"_id": survey_id},
+            {"results_snapshot_at": 1, "results_snapshot_version": 1, "created_at": 1, "updated_at": 1}
+        )
+        if not self._snapshot_is_fresh(survey_doc, client_id):
+            self.rebuild_results_snapshot(survey_id, client_id)
+
+    def refresh_results_snapshot(self, survey_id: str, employee_id: str, keys):
+        """
+        Incrementally refreshes the snapshot rows of one evaluator after a submission.
+
+        Surveys whose snapshot was never built are skipped (it is built on the next read).
+        If the refresh fails the snapshot is invalidated, so the next read rebuilds it.
+
+        :param keys: List of (target_employee_id, target_type) tuples that were written.
+        """
+        surveys_coll = self.mongo_db.get_collection("Surveys")
+        try:
+            survey_doc = surveys_coll.find_one(
+                {"_id": survey_id},
+                {"client_id": 1, "results_snapshot_at": 1, "stage_ids": 1, "created_at": 1, "updated_at": 1}
+            )
+            if not survey_doc or not survey_doc.get("results_snapshot_at") or not keys:
+                return
+
+            answers_coll = self.mongo_db.get_collection("SurveyAnswers")
+            answer_docs = list(answers_coll.find({
+                **SurveyResults.keys_query(survey_id, employee_id, keys),
+                "status": "completed"
+            }))
+
+            client_id = survey_doc.get("client_id")
+            snapshots = []
+            if answer_docs:
+                evaluated_ids = {doc.get("target_employee_id") for doc in answer_docs if doc.get("target_employee_id")}
+                context = self._results_context(survey_doc, client_id, evaluated_ids)
+                snapshots = [self._snapshot_for_doc(doc, context, survey_id, client_id) for doc in answer_docs]
+
+            self._results_snapshot().replace_for_keys(survey_id, employee_id, keys, snapshots)
+
+        except Exception as e:
+            logger.error(f"Error refreshing results snapshot of survey {survey_id}, invalidating it: {e}")
+            surveys_coll.update_one({"_id": survey_id}, {"$unset": {"results_snapshot_at": ""}})
+
+    def discard_results_snapshot(self, survey_id: str, query):
+        """
+        Removes the snapshot rows matching an answer query, e.g. after answers are
+        saved back to "in_progress" or deleted. On failure the snapshot is invalidated.
+
+        :param query: SurveyAnswers query ({"survey_id", "employee_id", ...}).
+        """
+        try:
+            self._results_snapshot().delete(query)
+        except Exception as e:
+            logger.error(f"Error discarding results snapshot rows of survey {survey_id}, invalidating it: {e}")
+            self.mongo_db.get_collection("Surveys").update_one(
+                {"_id": survey_id}, {"$unset": {"results_snapshot_at": ""}}
+            )
+
+    def iter_results(self, survey_id: str, client_id: str):
+        """
+        Streams result rows for a survey from its materialized SurveyResults snapshot,
+        building the snapshot first if needed.
+
+        Yields:
+            Tuples ("closed", row) or ("open", row), where row is a dict keyed by
+            CLOSED_COLUMNS or OPEN_COLUMNS respectively.
+        """
+        try:
+            self.ensure_results_snapshot(survey_id, client_id)
+            yield from self._results_snapshot().iter_rows(survey_id, self.RESULTS_BATCH_SIZE)
 
         except Exception as e:
             logger.error(f"Error in get_results: {e}")
             raise e
 
+    def get_results(self, survey_id: str, client_id: str):
+        """
+        Returns the (closed_list, open_list) result rows of a survey.
+        Prefer iter_results() for large surveys, which does not materialise the rows.
+        """
+        closed_list = []
+        open_list = []
+        for kind, row in self.iter_results(survey_id, client_id):
+            if kind == "closed":
+                closed_list.append(row)
+            else:
+                open_list.append(row)
+        return closed_list, open_list
+
+    @staticmethod
+    def _summary_facets(evaluated_fields=()):
+        """
+        Builds the $facet stage shared by both aggregation pipelines. Its input documents
+        are counts grouped by {evaluated, competence_id, value} carrying a competence_name
+        (and the fields in `evaluated_fields`, e.g. the evaluated employee's name).
+        """
+        distribution_group = {
+            "count": {"$sum": "$count"},
+            "total": {"$sum": {"$multiply": ["$_id.value", "$count"]}},
+            "distribution": {"$push": {"value": "$_id.value", "count": "$count"}}
+        }
+        summary_projection = {
+            "_id": 0,
+            "competence_name": 1,
+            "count": 1,
+            "average": {"$cond": [{"$gt": ["$count", 0]}, {"$divide": ["$total", "$count"]}, None]},
+            "distribution": 1
+        }
+        return {"$facet": {
+            "by_evaluated": [
+                {"$group": {
+                    "_id": {"evaluated": "$_id.evaluated", "competence_id": "$_id.competence_id"},
+                    **{field: {"$first": f"${field}"} for field in evaluated_fields},
+                    "competence_name": {"$first": "$competence_name"},
+                    **distribution_group
+                }},
+                {"$project": {
+                    **summary_projection,
+                    **{field: 1 for field in evaluated_fields},
+                    "evaluated_employee_id": "$_id.evaluated",
+                    "competence_id": "$_id.competence_id"
+                }},
+                {"$sort": {"evaluated_employee_id": 1, "competence_id": 1}}
+            ],
+            "by_competence": [
+                {"$group": {
+                    "_id": {"competence_id": "$_id.competence_id", "value": "$_id.value"},
+                    "competence_name": {"$first": "$competence_name"},
+                    "count": {"$sum": "$count"}
+                }},
+                {"$group": {
+                    "_id": {"competence_id": "$_id.competence_id"},
+                    "competence_name": {"$first": "$competence_name"},
+                    **distribution_group
+                }},
+                {"$project": {**summary_projection, "competence_id": "$_id.competence_id"}},
+                {"$sort": {"competence_id": 1}}
+            ]
+        }}
+
+    @staticmethod
+    def _snapshot_aggregation_pipeline(survey_id: str):
+        """
+        Builds the pipeline that computes closed-answer statistics from the survey's
+        SurveyResults snapshot: closed rows are unwound, counted per (evaluated employee,
+        competence, value) and summarised per competence and per (evaluated employee, competence).
+        """
+        return [
+            {"$match": {"survey_id": survey_id}},
+            {"$project": {"_id": 0, "closed": 1}},
+            {"$unwind": "$closed"},
+            {"$group": {
+                "_id": {
+                    "evaluated": "$closed.ID EMPLEADO EVALUADO",
+                    "competence_id": "$closed.ID COMPETENCIA",
+                    "value": "$closed.PONDERACIÓN DE LA RESPUESTA"
+                },
+                "name": {"$first": "$closed.NOMBRE"},
+                "competence_name": {"$first": "$closed.NOMBRE COMPETENCIA"},
+                "count": {"$sum": 1}
+            }},
+            SurveyService._summary_facets(("name",))
+        ]
+
+    @staticmethod
+    def _answers_aggregation_pipeline(survey_id: str, stage_ids):
+        """
+        Builds the pipeline that computes the same statistics straight from the completed
+        SurveyAnswers documents, used while the snapshot is not fresh.
+
+        Answers are unwound and cast to int (answers that cannot be cast are free text
+        and are skipped), counted per (evaluated employee, question, value) and joined
+        with their competence through a $lookup on Stages before being summarised.
+        """
+        stage_match = {"test_item.id": {"$in": stage_ids}} if stage_ids else {}
+        return [
+            {"$match": {"survey_id": survey_id, "status": "completed"}},
+            {"$project": {"_id": 0, "evaluated": "$target_employee_id", "answers": 1}},
+            {"$unwind": "$answers"},
+            {"$project": {
+                "evaluated": 1,
+                "question_id": "$answers.question_id",
+                "value": {"$convert": {
+                    "input": "$answers.answer", "to": "int", "onError": None, "onNull": None
+                }}
+            }},
+            {"$match": {"value": {"$ne": None}}},
+            {"$group": {
+                "_id": {"evaluated": "$evaluated", "question_id": "$question_id", "value": "$value"},
+                "count": {"$sum": 1}
+            }},
+            {"$lookup": {
+                "from": "Stages",
+                "let": {"qid": "$_id.question_id"},
+                "pipeline": [
+                    {"$match": stage_match},
+                    {"$unwind": "$test_item"},
+                    {"$match": stage_match},
+                    {"$match": {"$expr": {
+                        "$in": ["$$qid", {"$ifNull": ["$test_item.questions.id", []]}]
+                    }}},
+                    {"$project": {"_id": 0, "id": "$test_item.id", "name": "$test_item.name"}},
+                    {"$limit": 1}
+                ],
+                "as": "competence"
+            }},
+            {"$set": {"competence": {"$ifNull": [
+                {"$arrayElemAt": ["$competence", 0]}, {"id": "N/A", "name": "N/A"}
+            ]}}},
+            {"$group": {
+                "_id": {
+                    "evaluated": "$_id.evaluated",
+                    "competence_id": "$competence.id",
+                    "value": "$_id.value"
+                },
+                "competence_name": {"$first": "$competence.name"},
+                "count": {"$sum": "$count"}
+            }},
+            SurveyService._summary_facets()
+        ]
+
+    def _evaluated_names(self, client_id: str, evaluated_ids):
+        """
+        Loads "first paternal maternal" names of the given employees with a single query.
+        """
+        if not evaluated_ids:
+            return {}
+        employees = (self.db.session.query(Employee.id, Employee.first_name,
+                                           Employee.last_name_paternal, Employee.last_name_maternal)
+                     .filter(Employee.client_id == client_id, Employee.id.in_(evaluated_ids))
+                     .all())
+        return {emp.id: f"{emp.first_name} {emp.last_name_paternal} {emp.last_name_maternal}" for emp in employees}
+
+    def get_aggregated_results(self, survey_id: str, client_id: str):
+        """
+        Computes per-competence and per-evaluated-employee statistics of the closed
+        answers (count, average and value distribution) with a MongoDB aggregation,
+        so individual answers never leave the database.
+
+        A fresh SurveyResults snapshot is aggregated directly. Otherwise the pipeline runs
+        over the completed SurveyAnswers documents instead: this read never rebuilds the
+        snapshot (exports and the rebuild endpoint do).
+
+        Returns:
+            dict: {"survey_id", "by_competence": [...], "by_evaluated": [...]}
+        """
+        try:
+            surveys_coll = self.mongo_db.get_collection("Surveys")
+            survey_doc = surveys_coll.find_one(
+                {"_id": survey_id},
+                {"stage_ids": 1, "results_snapshot_at": 1, "results_snapshot_version": 1,
+                 "created_at": 1, "updated_at": 1}
+            )
+            if not survey_doc:
+                raise ValueError("Survey not found")
+
+            from_snapshot = self._snapshot_is_fresh(survey_doc, client_id)
+            if from_snapshot:
+                coll = self.mongo_db.get_collection("SurveyResults")
+                pipeline = self._snapshot_aggregation_pipeline(survey_id)
+            else:
+                coll = self.mongo_db.get_collection("SurveyAnswers")
+                pipeline = self._answers_aggregation_pipeline(survey_id, survey_doc.get("stage_ids") or [])
+            facets = next(coll.aggregate(pipeline, allowDiskUse=True), {})
+            by_competence = facets.get("by_competence", [])
+            by_evaluated = facets.get("by_evaluated", [])
+
+            if not from_snapshot:
+                names = self._evaluated_names(
+                    client_id, {row["evaluated_employee_id"] for row in by_evaluated if row.get("evaluated_employee_id")}
+                )
+                for row in by_evaluated:
+                    row["name"] = names.get(row.get("evaluated_employee_id"), "Unknown")
+
+            for row in by_competence + by_evaluated:
+                row["distribution"] = sorted(row["distribution"], key=lambda d: d["value"])
+
+            return {
+                "survey_id": survey_id,
+                "by_competence": by_competence,
+                "by_evaluated": by_evaluated
+            }
+
+        except Exception as e:
+            logger.error(f"Error in get_aggregated_results: {e}")
+            raise e
+
+    @staticmethod
+    def _cell_value(value):
+        # openpyxl only writes scalar cell values
+        if isinstance(value, (list, dict)):
+            return str(value)
+        return value
 
     def get_excel(self, survey_id: str, client_id: str):
             """
-            Creates an Excel file (in-memory) with two sheets based on survey results.
-            
+            Creates an Excel file with two sheets based on survey results.
+
             This function:
-            - Calls get_results() to retrieve raw closed and open answer data.
-            - Creates two Pandas DataFrames (one for closed answers and one for open answers).
-            - Writes these DataFrames to an in-memory Excel file with two sheets:
+            - Streams result rows from iter_results() (answer documents are read in batches).
+            - Appends each row directly to a write-only openpyxl workbook with two sheets:
                     "Closed Questions" and "Open Questions".
-            
+            - Saves the workbook to a disk-backed temporary file, so peak memory stays
+              bounded regardless of the number of answers.
+
             Returns:
-                BytesIO: An in-memory bytes buffer containing the Excel file.
+                A binary file object positioned at the start of the Excel file.
+                The caller is responsible for closing it (see iter_file_chunks).
             """
             try:
-                import io
-                import pandas as pd
-
-                # Retrieve raw results data.
-                closed_list, open_list = self.get_results(survey_id, client_id)
-
-                logger.info(closed_list)
-                # Create DataFrames in this function.
-                closed_df = pd.DataFrame(closed_list, columns=[
-                    "RFC CLIENTE",
-                    "CLIENTE",
-                    "ID EVENTO",
-                    "ID EMPLEADO EVALUADO",
-                    "NOMBRE",
-                    "ID COMPETENCIA",
-                    "NOMBRE COMPETENCIA",
-                    "ID REACTIVO",
-                    "NOMBRE REACTIVO",
-                    "TIPO USUARIO",
-                    "PONDERACIÓN DE LA RESPUESTA"
-                ])
-                open_df = pd.DataFrame(open_list, columns=[
-                    "RFC CLIENTE",
-                    "CLIENTE",
-                    "ID EVENTO",
-                    "ID EMPLEADO EVALUADO",
-                    "NOMBRE",
-                    "ID COMPETENCIA",
-                    "NOMBRE COMPETENCIA",
-                    "ID REACTIVO",
-                    "NOMBRE REACTIVO",
-                    "TIPO USUARIO",
-                    "TEXTO LIBRE"
-                ])
-                # Create an in-memory Excel file with two sheets.
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                    closed_df.to_excel(writer, sheet_name="Closed Questions", index=False)
-                    open_df.to_excel(writer, sheet_name="Open Questions", index=False)
+                workbook = Workbook(write_only=True)
+                closed_sheet = workbook.create_sheet("Closed Questions")
+                open_sheet = workbook.create_sheet("Open Questions")
+                closed_sheet.append(self.CLOSED_COLUMNS)
+                open_sheet.append(self.OPEN_COLUMNS)
+
+                closed_count = 0
+                open_count = 0
+                for kind, row in self.iter_results(survey_id, client_id):
+                    if kind == "closed":
+                        closed_sheet.append([self._cell_value(row.get(col)) for col in self.CLOSED_COLUMNS])
+                        closed_count += 1
+                    else:
+                        open_sheet.append([self._cell_value(row.get(col)) for col in self.OPEN_COLUMNS])
+                        open_count += 1
+
+                output = tempfile.TemporaryFile()
+                workbook.save(output)
                 output.seek(0)
+                logger.info(
+                    f"Exported {closed_count} closed and {open_count} open answers for survey {survey_id}"
+                )
                 return output
 
             except Exception as e:
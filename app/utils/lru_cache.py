@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """
+    Small thread-safe, in-process least-recently-used cache.
+
+    Args:
+        maxsize (int): Maximum number of entries kept before the least recently used one is evicted.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for `key` (marking it as recently used) or `default`.
+        """
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        """
+        Stores `value` under `key`, evicting the least recently used entries if needed.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """
+        Removes `key` from the cache if present.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
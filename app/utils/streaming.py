@@ -0,0 +1,16 @@
+def iter_file_chunks(file_obj, chunk_size: int = 64 * 1024):
+    """
+    Yields the content of a binary file object in fixed-size chunks and closes it afterwards.
+    Used to stream generated files (e.g. Excel exports) as chunked Flask responses.
+
+    :param file_obj: Binary file object positioned where streaming should start.
+    :param chunk_size: Number of bytes per chunk.
+    """
+    try:
+        while True:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file_obj.close()
@@ -0,0 +1,81 @@
+import pandas as pd
+
+
+def missing_columns(df, columns):
+    """
+    Returns the expected sheet columns (an iterable, e.g. the keys of a column map) absent from `df`.
+    """
+    return [col for col in columns if col not in df.columns]
+
+
+def _blank(series):
+    """
+    Mask of empty cells: NaN/None/NaT or whitespace-only strings.
+    """
+    return series.isna() | series.astype("string").str.strip().eq("").fillna(True)
+
+
+def _coerce_ids(series):
+    """
+    Identifiers as strings without the float suffix Excel adds ("123.0" -> "123").
+    Only a trailing ".0" is removed; any other dot is kept as part of the value.
+    """
+    ids = series.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    return ids.mask(_blank(series) | ids.eq(""))
+
+
+def normalize_frame(df, column_map=None, required=(), id_columns=(), int_columns=(), date_columns=(),
+                    unique_columns=()):
+    """
+    Vectorized normalisation and validation of an uploaded sheet.
+
+    Every step works column-wise:
+        - columns are renamed with `column_map` (sheet name -> field) and only mapped columns are kept
+        - `id_columns` become strings without a trailing ".0"
+        - `int_columns` are parsed as integers (same ".0" handling)
+        - `date_columns` are parsed into datetime.date
+        - rows with blank `required` fields, unparsable values or a repeated value in
+          any of `unique_columns` are reported and dropped
+        - remaining NaN/NaT values become None
+
+    :return: Tuple (records, errors): records is a list of (row, dict) for the valid rows,
+             errors a list of {"row", "error"}; rows are the DataFrame index labels.
+    """
+    if column_map:
+        df = df[list(column_map)].rename(columns=column_map)
+    else:
+        df = df.copy()
+
+    problems = {}
+
+    def report(mask, message):
+        for row in df.index[mask.to_numpy()]:
+            problems.setdefault(row, []).append(message)
+
+    for col in required:
+        report(_blank(df[col]), f"Missing required field: {col}")
+
+    for col in id_columns:
+        df[col] = _coerce_ids(df[col])
+
+    for col in int_columns:
+        blank = _blank(df[col])
+        parsed = pd.to_numeric(_coerce_ids(df[col]), errors="coerce")
+        parsed = parsed.where(parsed.mod(1).eq(0))
+        report(~blank & parsed.isna(), f"Invalid integer in {col}")
+        df[col] = parsed.astype("Int64")
+
+    for col in date_columns:
+        blank = _blank(df[col])
+        parsed = pd.to_datetime(df[col], errors="coerce", format="mixed")
+        report(~blank & parsed.isna(), f"Invalid date in {col}")
+        df[col] = parsed.dt.date.where(parsed.notna(), None)
+
+    for col in unique_columns:
+        report(df[col].notna() & df.duplicated(col, keep="first"), f"Duplicate {col} in file")
+
+    errors = [{"row": row, "error": "; ".join(messages)} for row, messages in sorted(problems.items())]
+    valid = df.drop(index=list(problems))
+    valid = valid.astype(object).where(valid.notna(), None)
+    records = list(zip(valid.index.tolist(), valid.to_dict("records")))
+    return records, errors
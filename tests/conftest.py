@@ -0,0 +1,98 @@
+import uuid
+from threading import Lock
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeClock:
+    """
+    Virtual monotonic clock: sleep() advances time instantly, so rate limits and
+    backoffs can be checked without waiting. Every sleep advances at least one
+    microsecond, as a real clock would, so float rounding cannot stall a waiter.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self.lock = Lock()
+
+    def __call__(self):
+        with self.lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(seconds)
+            self.now += max(seconds, 1e-6)
+
+
+class FakeClerkRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("Too Many Requests")
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        self.raw_response = SimpleNamespace(status_code=429, headers=headers)
+
+
+class FakeClerkClient:
+    """
+    Local Clerk stub for exercising ClerkProvisioner without the real API: creates
+    in-memory users and answers 429 whenever more than `rate_limit` calls arrive within a second.
+    """
+
+    def __init__(self, clock, rate_limit: int = None, retry_after=None, fail_emails=(), fail_deletes=()):
+        self.clock = clock
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.fail_emails = set(fail_emails)
+        self.fail_deletes = set(fail_deletes)
+        self.created = {}
+        self.deleted = []
+        self.rate_limited = 0
+        self.calls = []
+        self.lock = Lock()
+        self.users = SimpleNamespace(create=self._create, delete=self._delete)
+
+    def _throttle(self):
+        with self.lock:
+            now = self.clock()
+            self.calls = [t for t in self.calls if now - t < 1.0]
+            if self.rate_limit is not None and len(self.calls) >= self.rate_limit:
+                self.rate_limited += 1
+                raise FakeClerkRateLimitError(self.retry_after)
+            self.calls.append(now)
+
+    def _create(self, request):
+        self._throttle()
+        email = request["email_address"][0]
+        if email in self.fail_emails:
+            raise ValueError(f"email_address {email} is taken")
+        user = SimpleNamespace(id=f"user_{uuid.uuid4().hex}", email_address=request["email_address"])
+        with self.lock:
+            self.created[user.id] = user
+        return user
+
+    def _delete(self, user_id):
+        self._throttle()
+        if user_id in self.fail_deletes:
+            raise ValueError(f"user {user_id} not found")
+        with self.lock:
+            self.created.pop(user_id, None)
+            self.deleted.append(user_id)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_clerk(clock):
+    """
+    Factory of FakeClerkClient instances sharing the test's virtual clock.
+    """
+    def factory(**kwargs):
+        return FakeClerkClient(clock, **kwargs)
+    return factory
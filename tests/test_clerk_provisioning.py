@@ -0,0 +1,100 @@
+from app.services.clerk_provisioning import ClerkProvisioner, TokenBucket
+
+
+def emails(n):
+    return [f"employee{i}@example.com" for i in range(n)]
+
+
+def provisioner(client, clock, rate_per_second=100, **kwargs):
+    return ClerkProvisioner(client, rate_per_second=rate_per_second, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_token_bucket_limits_throughput(clock):
+    bucket = TokenBucket(rate=5, clock=clock, sleep=clock.sleep)
+
+    for _ in range(25):
+        bucket.acquire()
+
+    # The first 5 tokens are the initial burst; the other 20 arrive at 5 per second
+    assert clock() >= 4.0 - 1e-6
+
+
+def test_token_bucket_allows_initial_burst(clock):
+    bucket = TokenBucket(rate=5, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert clock.sleeps == []
+
+
+def test_create_users_stays_within_rate_limit(clock, fake_clerk):
+    client = fake_clerk(rate_limit=10)
+
+    user_ids, errors = provisioner(client, clock, rate_per_second=5, max_workers=4).create_users(emails(40))
+
+    assert errors == {}
+    assert client.rate_limited == 0
+    assert all(user_ids)
+    assert set(user_ids) == set(client.created)
+
+
+def test_rate_limited_calls_are_retried_with_backoff(clock, fake_clerk):
+    client = fake_clerk(rate_limit=2)
+
+    user_ids, errors = provisioner(client, clock, max_workers=1, backoff=0.5).create_users(emails(3))
+
+    assert errors == {}
+    assert len(client.created) == 3
+    assert client.rate_limited == 2
+    # Exponential backoff: 0.5s, then 1s, after which the 1 second window has passed
+    assert clock.sleeps[-2:] == [0.5, 1.0]
+
+
+def test_retry_after_header_is_honoured(clock, fake_clerk):
+    client = fake_clerk(rate_limit=1, retry_after=3)
+
+    _, errors = provisioner(client, clock, max_workers=1, backoff=0.5).create_users(emails(2))
+
+    assert errors == {}
+    assert 3.0 in clock.sleeps
+
+
+def test_rate_limit_error_is_reported_after_max_retries(clock, fake_clerk):
+    client = fake_clerk(rate_limit=0)
+
+    user_ids, errors = provisioner(client, clock, max_workers=1, max_retries=2).create_users(emails(1))
+
+    assert user_ids == [None]
+    assert list(errors) == [0]
+    assert client.rate_limited == 3
+
+
+def test_partial_failure_is_rolled_back(clock, fake_clerk):
+    addresses = emails(5)
+    client = fake_clerk(fail_emails={addresses[2]})
+    clerk = provisioner(client, clock)
+
+    user_ids, errors = clerk.create_users(addresses)
+
+    assert list(errors) == [2]
+    assert user_ids[2] is None
+    created = [user_id for user_id in user_ids if user_id]
+    assert len(client.created) == 4
+
+    clerk.delete_users(created)
+
+    assert client.created == {}
+    assert sorted(client.deleted) == sorted(created)
+
+
+def test_rollback_keeps_going_when_a_delete_fails(clock, fake_clerk):
+    client = fake_clerk()
+    clerk = provisioner(client, clock)
+    user_ids, _ = clerk.create_users(emails(3))
+    client.fail_deletes = {user_ids[0]}
+
+    clerk.delete_users(user_ids)
+
+    assert list(client.created) == [user_ids[0]]
+    assert sorted(client.deleted) == sorted(user_ids[1:])
@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("networkx")
+pytest.importorskip("gensim")
+pytest.importorskip("sklearn")
+
+from app.ml import suggestion_engine  # noqa: E402
+from app.ml.benchmark import in_memory_engine, perturb_org_chart, run_incremental, synthetic_org_chart  # noqa: E402
+from app.ml.embeddings import spectral_embeddings  # noqa: E402
+from app.ml.suggestion_engine import SuggestionEngine  # noqa: E402
+
+# Small walks keep the test fast; several workers check that the seeded output
+# does not depend on thread scheduling.
+FAST_CONFIG = {"cache_dir": None, "walk_length": 10, "num_walks": 10, "emb_dim": 16, "workers": 2}
+
+
+@pytest.mark.parametrize("config", [
+    {"embedding_backend": "walks"},
+    {"embedding_backend": "node2vec"},
+    {"embedding_backend": "spectral"},
+    {"embedding_backend": "walks", "clustering": "knn_graph"},
+    {"mode": "structural"},
+], ids=["walks", "node2vec", "spectral", "walks-knn_graph", "structural"])
+def test_seeded_runs_are_identical(config):
+    employees = synthetic_org_chart(120, seed=3)
+    run_config = {**FAST_CONFIG, **config, "random_state": 42}
+
+    first = in_memory_engine(employees, run_config).assign_suggestions()
+    second = in_memory_engine(employees, run_config).assign_suggestions()
+
+    assert first
+    assert second == first
+
+
+def wide_tree_with_only_child():
+    """
+    Root 1 with 10 managers (2-11) of 10 reports each (12-111). Employee 500 is the only
+    report of 12, whose siblings have no reports: no siblings or cousins to suggest, so
+    500 is the only employee left short of peers by the supervisor tree.
+    """
+    employees = [SimpleNamespace(id=1, employee_number="E1", direct_supervisor_id=None, functional_supervisor_id=None)]
+    for manager in range(2, 12):
+        employees.append(SimpleNamespace(id=manager, employee_number=f"E{manager}",
+                                         direct_supervisor_id=1, functional_supervisor_id=None))
+    for report in range(12, 112):
+        employees.append(SimpleNamespace(id=report, employee_number=f"E{report}",
+                                         direct_supervisor_id=2 + (report - 12) // 10, functional_supervisor_id=None))
+    employees.append(SimpleNamespace(id=500, employee_number="E500", direct_supervisor_id=12,
+                                     functional_supervisor_id=None))
+    return employees
+
+
+def test_structural_fallback_embeds_only_the_short_employees_neighbourhood(monkeypatch):
+    employees = wide_tree_with_only_child()
+    embedded = []
+
+    def configured_backend(*args):
+        raise AssertionError("the structural fallback must not train the configured backend")
+
+    def spectral(G, ids, config):
+        embedded.append(list(ids))
+        return spectral_embeddings(G, ids, config)
+
+    monkeypatch.setattr(suggestion_engine, "compute_embeddings", configured_backend)
+    monkeypatch.setattr(suggestion_engine, "spectral_embeddings", spectral)
+    config = {**FAST_CONFIG, "mode": "structural", "top_k": 3, "structural_fallback_size": 5, "random_state": 42}
+
+    suggestions = in_memory_engine(employees, config).assign_suggestions()
+
+    assert len(embedded) == 1
+    assert 500 in embedded[0] and len(embedded[0]) == 5
+    assert all(len(items) == 3 for items in suggestions.values())
+    relations = {item["relation"]: item["employee_number"] for item in suggestions["E500"]}
+    assert relations["Jefe directo"] == "E12"
+    assert relations["Homólogo"] in {f"E{emp_id}" for emp_id in embedded[0]} - {"E500", "E12"}
+
+
+@pytest.fixture
+def full_retrains(monkeypatch):
+    """
+    Headcount of every run that computed embeddings from scratch.
+    """
+    runs = []
+    compute = SuggestionEngine._compute_embeddings
+
+    def counting_compute(self, G):
+        runs.append(len(self.employees))
+        return compute(self, G)
+
+    monkeypatch.setattr(SuggestionEngine, "_compute_embeddings", counting_compute)
+    return runs
+
+
+def test_incremental_update_overlaps_a_full_retrain():
+    config = {**FAST_CONFIG, "embedding_backend": "walks", "random_state": 42}
+
+    result = run_incremental(300, 3, config)
+
+    # Two full retrains with different seeds overlap about 0.7 on this chart
+    assert result["overlap"] >= 0.6
+
+
+def test_chained_incremental_updates_retrain_fully_past_the_change_budget(tmp_path, full_retrains):
+    config = {**FAST_CONFIG, "embedding_backend": "walks", "cache_dir": str(tmp_path), "random_state": 42,
+              "incremental_max_change": 0.05}
+
+    # Every step re-parents 2 employees and hires 2: about 2% of the org chart each time
+    employees = synthetic_org_chart(200, seed=3)
+    in_memory_engine(employees, config).assign_suggestions()
+    for step in range(3):
+        employees = perturb_org_chart(employees, 2, seed=step + 10)
+        in_memory_engine(employees, config).assign_suggestions()
+
+    # Steps 1 and 2 are incremental (2% then 4% since the retrain); step 3 would reach 6%
+    assert full_retrains == [200, 206]
+
+
+def test_incremental_chain_is_capped(tmp_path, full_retrains):
+    config = {**FAST_CONFIG, "embedding_backend": "walks", "cache_dir": str(tmp_path), "random_state": 42,
+              "incremental_max_change": 1.0, "incremental_max_chain": 2}
+
+    employees = synthetic_org_chart(200, seed=3)
+    in_memory_engine(employees, config).assign_suggestions()
+    for step in range(3):
+        employees = perturb_org_chart(employees, 1, seed=step + 10)
+        in_memory_engine(employees, config).assign_suggestions()
+
+    assert full_retrains == [200, 203]
@@ -0,0 +1,35 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from app.utils.upload_normalization import normalize_frame  # noqa: E402
+
+
+def test_id_columns_only_drop_the_excel_float_suffix():
+    df = pd.DataFrame({"supervisor": [123.0, "456.0", "A.1.0", "12.34", " 789 ", None]})
+
+    records, errors = normalize_frame(df, id_columns=("supervisor",))
+
+    assert errors == []
+    assert [record["supervisor"] for _, record in records] == ["123", "456", "A.1", "12.34", "789", None]
+
+
+def test_non_id_columns_are_kept_raw():
+    df = pd.DataFrame({"phone_number": ["555.123.4567"], "employee_number": ["7"]})
+
+    records, errors = normalize_frame(df, id_columns=(), int_columns=("employee_number",))
+
+    assert errors == []
+    assert records == [(0, {"phone_number": "555.123.4567", "employee_number": 7})]
+
+
+def test_int_columns_reject_fractional_values():
+    df = pd.DataFrame({"employee_number": ["10", 11.0, "12.5", "abc", None]})
+
+    records, errors = normalize_frame(df, int_columns=("employee_number",))
+
+    assert [record["employee_number"] for _, record in records] == [10, 11, None]
+    assert errors == [
+        {"row": 2, "error": "Invalid integer in employee_number"},
+        {"row": 3, "error": "Invalid integer in employee_number"},
+    ]